@@ -1,66 +1,221 @@
 import asyncio
-import json
 import os
-from datetime import datetime
+import time
+from collections.abc import AsyncIterator, Iterable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from http.cookies import SimpleCookie
 
-import aiofiles
 import aiohttp
-import inquirer
-from bs4 import BeautifulSoup, Tag
-from rich.live import Live
-from rich.progress import Progress, TaskID
 from rich.prompt import Prompt
-from user_agent import generate_user_agent
 
-from exception import ScriptTagNotFoundError, TextfileNotFoundError
+from exception import (
+    DownloadError,
+    IncompleteDownloadError,
+    PlayUrlExpiredError,
+    TextfileNotFoundError,
+    TiktokException,
+)
 from terminal.console import console
-from terminal.progress import ProgressBar
+from terminal.progress import TransferProgress
+
+from .detailcache import DetailCache, is_expired, play_expiry
+from .diskwriter import DiskWriter
+from .events import (
+    VideoDownloaded,
+    VideoEvent,
+    VideoFailed,
+    VideoProgress,
+    VideoResolved,
+    VideoSkipped,
+)
+from .extractor import parse_video_details
+from .manifest import DownloadManifest
+from .metadata import MetadataWriter
+from .metrics import metrics
+from .retry import RetryPolicy
+from .scheduler import DownloadScheduler
+from .session import ProxyRotator, build_session
+from .sinks import DiskSink
+from .throttle import BandwidthLimiter
+from .variants import VariantSelector
 
 
 class VideoDownloader:
     TXT_FILE = None
-    USER_AGENT = generate_user_agent()
+    USER_AGENT = None
+
+    def __init__(
+        self,
+        max_details: int = 16,
+        max_videos: int = 8,
+        max_per_host: int = 0,
+        force_download: bool = False,
+        parse_workers: int = 0,
+        parse_mode: str = "thread",
+        retries: int = 3,
+        backoff: float = 1.0,
+        pool_size: int = 100,
+        dns_ttl: int = 300,
+        keepalive: float = 30.0,
+        connect_timeout: float = 15.0,
+        read_timeout: float = 60.0,
+        proxy_file: str | None = None,
+        max_rate: float | None = None,
+        max_host_rate: float | None = None,
+        json_format: str = "ndjson",
+        sink=None,
+        variant_policy: str = "default",
+        max_height: int | None = None,
+        max_bitrate: int | None = None,
+        write_buffer: int = 1 << 20,
+        write_queue: int = 64,
+        preallocate: bool = False,
+        fsync: str = "never",
+        segments: int = 1,
+        segment_min: int = 16 << 20,
+        cache_ttl: float = 3600.0,
+        cache_size: int = 10000,
+        cache_path: str | None = None,
+        manifest_path: str | None = os.path.join("Tiktok VIDEOS", "manifest.sqlite"),
+    ):
+        self.scheduler = DownloadScheduler(max_details, max_videos, max_per_host)
+        self.force_download = force_download
+        persistent = sink is None or sink.persistent
+        # Only saved files are tracked across runs; None turns tracking off
+        self.manifest = (
+            DownloadManifest(manifest_path) if manifest_path and persistent else None
+        )
+        self.parse_workers = parse_workers
+        self.parse_mode = parse_mode
+        self.executor: Executor | None = None
+        self.retry = RetryPolicy(retries=retries, base_delay=backoff)
+        self.failed = []
+        self.session_options = {
+            "pool_size": pool_size,
+            "max_per_host": max_per_host,
+            "dns_ttl": dns_ttl,
+            "keepalive": keepalive,
+            "connect_timeout": connect_timeout,
+            "read_timeout": read_timeout,
+        }
+        self.proxies = ProxyRotator(proxy_file)
+        self.bandwidth = BandwidthLimiter(max_rate, max_host_rate)
+        self.json_format = json_format
+        self.writer = DiskWriter(
+            buffer_size=write_buffer,
+            queue_size=write_queue,
+            preallocate=preallocate,
+            fsync=fsync,
+        )
+        self.sink = sink or DiskSink(self.manifest, writer=self.writer)
+        self.segments = segments
+        self.segment_min = segment_min
+        if cache_path is None:
+            # Next to the videos, or for this run only when nothing is saved
+            cache_path = (
+                os.path.join("Tiktok VIDEOS", "details.sqlite")
+                if persistent
+                else ":memory:"
+            )
+        self.details_cache = (
+            DetailCache(cache_path, ttl=cache_ttl, max_entries=cache_size)
+            if cache_ttl > 0
+            else None
+        )
+        self.variants = VariantSelector(variant_policy, max_height, max_bitrate)
+        self.events: asyncio.Queue | None = None
+        self.progress_step = 0
 
     async def __aenter__(self):
-        self.client = aiohttp.ClientSession()
+        self.client = build_session(**self.session_options)
+        if self.parse_workers > 0:
+            pool = (
+                ProcessPoolExecutor
+                if self.parse_mode == "process"
+                else ThreadPoolExecutor
+            )
+            self.executor = pool(max_workers=self.parse_workers)
         return self
 
     async def __aexit__(self, *_):
         await self.client.close()
+        if self.manifest is not None:
+            self.manifest.close()
+        self.writer.close()
+        if self.details_cache is not None:
+            self.details_cache.close()
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    @classmethod
+    def _user_agent(cls):
+        """One random user agent per process, generated on first use."""
+        if cls.USER_AGENT is None:
+            from user_agent import generate_user_agent
+
+            cls.USER_AGENT = generate_user_agent()
+        return cls.USER_AGENT
+
+    def _emit(self, event: VideoEvent):
+        if self.events is not None:
+            self.events.put_nowait(event)
+
+    @staticmethod
+    def _video_id(tiktok_video_url: str):
+        return tiktok_video_url.split("?")[0].rstrip("/").split("/")[-1]
 
     async def _get_tiktok_video_details(
+        self,
+        session: aiohttp.ClientSession,
+        tiktok_video_url: str,
+        refresh: bool = False,
+    ):
+        """Details from the cache while their play URLs are valid, else from the page."""
+        video_id = self._video_id(tiktok_video_url)
+        details = None
+        if self.details_cache is not None and not refresh:
+            details = self.details_cache.get(video_id)
+            metrics.count("detail_cache", result="miss" if details is None else "hit")
+        if details is None:
+            details = await self._fetch_details(session, tiktok_video_url)
+            if self.details_cache is not None:
+                self.details_cache.put(video_id, details)
+        details["variant"] = self.variants.choose(details)
+        metrics.count("variants", gear=details["variant"]["gear"])
+        return details
+
+    async def _fetch_details(
         self, session: aiohttp.ClientSession, tiktok_video_url: str
     ):
-        headers = {"User-Agent": self.USER_AGENT}
-        async with session.get(tiktok_video_url, headers=headers) as response:
-            response.raise_for_status()
-            soup = BeautifulSoup(await response.text(), "lxml")
-            script_tag = soup.select_one("script#__UNIVERSAL_DATA_FOR_REHYDRATION__")
-            if script_tag:
-                return self._handle_script_tag(script_tag, response)
-            raise ScriptTagNotFoundError("Script tag is not found.")
-
-    def _handle_script_tag(self, script_tag: Tag, response: aiohttp.ClientResponse):
-        tag_contents = script_tag.contents[0]
-        universal = json.loads(tag_contents)
-        default_scope = universal.get("__DEFAULT_SCOPE__", {})
-        video_details = default_scope.get("webapp.video-detail", {})
-        video_info = video_details.get("itemInfo", {}).get("itemStruct", {})
-        video_dict = video_info.get("video", {})
-
-        return {
-            "id": video_info.get("id", ""),
-            "desc": video_info.get("desc", ""),
-            "createTime": datetime.utcfromtimestamp(
-                int(video_info.get("createTime", 0))
-            ).strftime("%Y-%m-%d %H:%M:%S"),
-            "unwatermarked": video_dict.get("playAddr", ""),
-            "watermarked": video_dict.get("downloadAddr", ""),
-            "bitrate": video_dict.get("bitrate", ""),
-            "cookies": response.cookies,
-            "author": video_info.get("author", {}),
-        }
+        headers = {"User-Agent": self._user_agent()}
+        async with self.scheduler.detail_slot(tiktok_video_url):
+            with metrics.stage("detail_fetch"):
+                async with session.get(
+                    tiktok_video_url, headers=headers, proxy=self.proxies.next()
+                ) as response:
+                    response.raise_for_status()
+                    html = await response.text()
+        details = await self._parse_details(html)
+        details["cookies"] = response.cookies
+        details["expires_at"] = play_expiry(details)
+        return details
+
+    async def _parse_details(self, html: str):
+        with metrics.stage("parse"):
+            if self.executor is None:
+                return parse_video_details(html)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, parse_video_details, html)
+
+    @staticmethod
+    def _parse_content_range(content_range: str):
+        """Split a 'bytes start-end/total' header into (start, total)."""
+        try:
+            span, _, total = content_range.partition(" ")[2].partition("/")
+            start = None if span == "*" else int(span.split("-")[0])
+            return start, (None if total == "*" else int(total))
+        except ValueError:
+            return None, None
 
     async def _download_video_core(
         self,
@@ -69,17 +224,19 @@ class VideoDownloader:
         create_time: str,
         cookies: SimpleCookie,
         tiktok_video_url: str,
-        job_progress: Progress,
-        overall_progress: Progress,
-        overall_task: TaskID,
-        instant_clear: bool,
+        progress: TransferProgress,
     ):
+        if not video_download_url:
+            raise DownloadError("Couldn't find video download URL")
+
+        video_id = self._video_id(tiktok_video_url)
+        target = self.sink.target(tiktok_video_url, video_id, create_time)
         headers = {
-            "User-Agent": self.USER_AGENT,
+            "User-Agent": self._user_agent(),
             "Accept": "video/webm,video/ogg,video/*;q=0.9,application/ogg;q=0.7,audio/*;q=0.6,*/*;q=0.5",
             "Accept-Language": "en-US,en;q=0.5",
             "Referer": "https://www.tiktok.com/",
-            "Range": "bytes=0-",
+            "Range": f"bytes={target.offset}-",
             "Origin": "https://www.tiktok.com",
             "DNT": "1",
             "Sec-GPC": "1",
@@ -88,93 +245,310 @@ class VideoDownloader:
             "Sec-Fetch-Mode": "cors",
             "Sec-Fetch-Site": "same-site",
         }
-        if video_download_url:
-            async with session.get(
-                video_download_url, headers=headers, cookies=cookies
-            ) as response:
-                response.raise_for_status()
-                await self._handle_video_response(
-                    response,
+        async with self.scheduler.video_slot(video_download_url):
+            with metrics.stage("transfer"):
+                async with session.get(
                     video_download_url,
-                    create_time,
-                    tiktok_video_url,
-                    job_progress,
-                    overall_progress,
-                    overall_task,
-                    instant_clear,
-                )
+                    headers=headers,
+                    cookies=cookies,
+                    proxy=self.proxies.next(),
+                ) as response:
+                    if response.status in (403, 410):
+                        raise PlayUrlExpiredError(
+                            f"Play URL of {video_id} was refused ({response.status})"
+                        )
+                    if response.status == 416:
+                        await self._handle_unsatisfiable_range(
+                            response, target, tiktok_video_url, progress
+                        )
+                        return
+                    response.raise_for_status()
+                    await self._handle_video_response(
+                        response,
+                        video_download_url,
+                        target,
+                        tiktok_video_url,
+                        progress,
+                        lambda first, end: session.get(
+                            video_download_url,
+                            headers={**headers, "Range": f"bytes={first}-{end - 1}"},
+                            cookies=cookies,
+                            proxy=self.proxies.next(),
+                        ),
+                    )
+
+    async def _handle_unsatisfiable_range(
+        self,
+        response: aiohttp.ClientResponse,
+        target,
+        tiktok_video_url: str,
+        progress: TransferProgress,
+    ):
+        """The server refused our resume offset: either the part is whole or stale."""
+        _, total = self._parse_content_range(response.headers.get("Content-Range", ""))
+        if total is not None and total == target.offset:
+            hasher = await target.open(target.offset)
+            await target.close()
+            self._finish(target, tiktok_video_url, target.offset, hasher.hexdigest())
+            progress.advance()
         else:
-            console.print(
-                f"[red1] Couldn't find video download URL for[/] {tiktok_video_url}"
+            target.discard()
+            raise IncompleteDownloadError(
+                f"Discarded stale partial download of {target.video_id}"
             )
-            overall_progress.update(overall_task, advance=1)
 
     async def _handle_video_response(
         self,
         response: aiohttp.ClientResponse,
         video_download_url: str,
-        create_time: str,
+        target,
         tiktok_video_url: str,
-        job_progress: Progress,
-        overall_progress: Progress,
-        overall_task: TaskID,
-        instant_clear: bool,
+        progress: TransferProgress,
+        fetch_range=None,
     ):
+        video_id = target.video_id
+        offset = target.offset
+        content_length = int(response.headers.get("Content-Length", 0))
         if response.status == 206:
-            videos_directory = "Tiktok VIDEOS"
-            os.makedirs(videos_directory, exist_ok=True)
-
-            username = tiktok_video_url.split("@")[-1].split("/")[0]
-            video_id = tiktok_video_url.split("/")[-1]
-            video_date = create_time.split(" ")[0]
-
-            user_directory = os.path.join(videos_directory, username)
-            os.makedirs(user_directory, exist_ok=True)
-            filename = f"{user_directory}/video-{video_id}-{video_date}.mp4"
-
-            async with aiofiles.open(filename, "wb") as file:
-                content_length = int(response.headers.get("Content-Length", 0))
-                job_task = job_progress.add_task(
-                    f"[blue_violet]Downloading [blue1]{video_id}",
-                    total=content_length,
+            start, total = self._parse_content_range(
+                response.headers.get("Content-Range", "")
+            )
+            if start is None:
+                start = offset
+            if start not in (0, offset):
+                raise DownloadError(
+                    f"Streaming failed for url {video_download_url}: unexpected range start {start}"
                 )
-                received = 0
-                async for chunk in response.content.iter_any():
-                    if chunk:
-                        await file.write(chunk)
-                        received += len(chunk)
-                        job_progress.update(job_task, completed=received)
-
-                overall_progress.update(overall_task, advance=1)
-
-            if instant_clear:
-                job_progress.remove_task(job_task)
+            total = total or start + content_length
+        elif response.status == 200:
+            start, total = 0, content_length
         else:
-            console.print(
+            raise DownloadError(
                 f"Streaming failed for url {video_download_url}: {response.status}"
             )
 
+        if fetch_range is not None and self._wants_segments(
+            response, target, start, total
+        ):
+            # Each extra range is another connection to the same CDN host
+            async with self.scheduler.spare_host_slots(
+                video_download_url, self.segments - 1
+            ) as spare:
+                if spare:
+                    await self._download_segments(
+                        response,
+                        fetch_range,
+                        video_download_url,
+                        target,
+                        tiktok_video_url,
+                        self._split_range(start, total, spare + 1),
+                        total,
+                        progress,
+                    )
+                    return
+
+        hasher = await target.open(start, total)
+        transfer = progress.start(video_id, total, start)
+        received = start
+        write_seconds = 0.0
+        throttled = self.bandwidth.enabled
+        unthrottled = 0
+        reporting = self.events is not None and self.progress_step > 0
+        reported = start
+        try:
+            async for chunk in response.content.iter_any():
+                if chunk:
+                    write_start = time.perf_counter()
+                    await target.write(chunk)
+                    write_seconds += time.perf_counter() - write_start
+                    hasher.update(chunk)
+                    received += len(chunk)
+                    transfer.completed = received
+                    if throttled:
+                        unthrottled += len(chunk)
+                        if unthrottled >= self.bandwidth.QUANTUM:
+                            await self.bandwidth.throttle(
+                                video_download_url, unthrottled
+                            )
+                            unthrottled = 0
+                    if reporting and received - reported >= self.progress_step:
+                        reported = received
+                        self._emit(
+                            VideoProgress(tiktok_video_url, video_id, received, total)
+                        )
+
+            if total and received != total:
+                raise IncompleteDownloadError(
+                    f"Incomplete download {video_id}: {received}/{total} bytes"
+                )
+        except BaseException:
+            progress.discard(transfer)
+            raise
+        finally:
+            await target.close()
+            metrics.count("bytes_downloaded", received - start)
+            metrics.observe("disk_write", write_seconds)
+
+        self._finish(target, tiktok_video_url, received, hasher.hexdigest())
+        progress.finish(transfer)
+
+    def _wants_segments(
+        self, response: aiohttp.ClientResponse, target, start: int, total: int
+    ):
+        return (
+            self.segments > 1
+            and response.status == 206
+            and target.segmentable
+            and bool(total)
+            and total - start >= self.segment_min
+        )
+
+    @staticmethod
+    def _split_range(start: int, total: int, count: int):
+        """Split [start, total) into `count` (first, end) ranges."""
+        size = -(-(total - start) // count)
+        return [
+            (first, min(first + size, total)) for first in range(start, total, size)
+        ]
+
+    async def _download_segments(
+        self,
+        response: aiohttp.ClientResponse,
+        fetch_range,
+        video_download_url: str,
+        target,
+        tiktok_video_url: str,
+        bounds: list,
+        total: int,
+        progress: TransferProgress,
+    ):
+        """Fetch each range on its own connection and write it in place.
+
+        The first range is read from the response already open, the others
+        from `fetch_range(first, end)`. They share one progress task, and the
+        checksum is taken from the assembled file.
+        """
+        video_id = target.video_id
+        start = bounds[0][0]
+        files = await target.open_segments(start, total, bounds)
+        transfer = progress.start(video_id, total, start)
+        received = start
+        reported = start
+        write_seconds = 0.0
+        reporting = self.events is not None and self.progress_step > 0
+
+        async def pump(segment: aiohttp.ClientResponse, file, first: int, end: int):
+            nonlocal received, reported, write_seconds
+            position = first
+            unthrottled = 0
+            try:
+                async for chunk in segment.content.iter_any():
+                    if len(chunk) > end - position:
+                        chunk = chunk[: end - position]
+                    write_start = time.perf_counter()
+                    await file.write(chunk)
+                    write_seconds += time.perf_counter() - write_start
+                    position += len(chunk)
+                    received += len(chunk)
+                    transfer.completed = received
+                    if self.bandwidth.enabled:
+                        unthrottled += len(chunk)
+                        if unthrottled >= self.bandwidth.QUANTUM:
+                            await self.bandwidth.throttle(
+                                video_download_url, unthrottled
+                            )
+                            unthrottled = 0
+                    if reporting and received - reported >= self.progress_step:
+                        reported = received
+                        self._emit(
+                            VideoProgress(tiktok_video_url, video_id, received, total)
+                        )
+                    if position >= end:
+                        break
+            finally:
+                # When a range's last bytes fill aiohttp's buffer, 3.8 hands the
+                # connection back to the pool with reading paused, and only
+                # draining the buffer resumes it; otherwise the next request on
+                # that connection waits for headers until sock_read. A range we
+                # stop short of its end (the open-ended first one) is closed
+                if segment.content.is_eof() and segment.content.exception() is None:
+                    segment.content.read_nowait()
+                segment.close()
+            if position != end:
+                raise IncompleteDownloadError(
+                    f"Incomplete segment {first}-{end} of {video_id}: "
+                    f"{position - first}/{end - first} bytes"
+                )
+
+        async def fetch(file, first: int, end: int):
+            async with fetch_range(first, end) as segment:
+                segment.raise_for_status()
+                range_start, _ = self._parse_content_range(
+                    segment.headers.get("Content-Range", "")
+                )
+                if segment.status != 206 or range_start != first:
+                    raise DownloadError(
+                        f"Streaming failed for url {video_download_url}: "
+                        f"range {first}-{end} not honoured"
+                    )
+                await pump(segment, file, first, end)
+
+        tasks = [asyncio.create_task(pump(response, files[0], *bounds[0]))]
+        tasks += [
+            asyncio.create_task(fetch(file, first, end))
+            for file, (first, end) in zip(files[1:], bounds[1:])
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            progress.discard(transfer)
+            raise
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await target.close()
+            metrics.count("bytes_downloaded", received - start)
+            metrics.count("segments", len(bounds))
+            metrics.observe("disk_write", write_seconds)
+
+        self._finish(target, tiktok_video_url, total, await target.checksum())
+        progress.finish(transfer)
+
+    def _finish(self, target, tiktok_video_url: str, size: int, sha256: str):
+        stored = target.commit(size, sha256)
+        metrics.count("videos", status="done")
+        self._emit(
+            VideoDownloaded(tiktok_video_url, target.video_id, size, sha256, **stored)
+        )
+
     async def _download_video(
         self,
         session: aiohttp.ClientSession,
         result: dict,
         tiktok_video_url: str,
-        job_progress: Progress,
-        overall_progress: Progress,
-        overall_task: TaskID,
-        instant_clear: bool,
+        progress: TransferProgress,
     ):
-        await self._download_video_core(
-            session,
-            result["unwatermarked"],
-            result["createTime"],
-            result["cookies"],
-            tiktok_video_url,
-            job_progress,
-            overall_progress,
-            overall_task,
-            instant_clear,
-        )
+        if is_expired(result.get("expires_at")):
+            # Signed URLs go stale while queued or between retries: re-resolve
+            result.update(
+                await self._get_tiktok_video_details(
+                    session, tiktok_video_url, refresh=True
+                )
+            )
+            metrics.count("detail_cache", result="revalidated")
+        try:
+            await self._download_video_core(
+                session,
+                result["variant"]["url"],
+                result["createTime"],
+                result["cookies"],
+                tiktok_video_url,
+                progress,
+            )
+        except PlayUrlExpiredError:
+            result["expires_at"] = 0
+            raise
 
     def load_urls(self, username: str):
         url_directory = "Tiktok URL"
@@ -187,6 +561,8 @@ class VideoDownloader:
                     f"No text file found in the folder '{url_directory}'"
                 )
 
+            import inquirer
+
             text_file = inquirer.List(
                 "filename",
                 message="Select a filename:",
@@ -199,6 +575,31 @@ class VideoDownloader:
         with open(filename, "r") as file:
             return [url.strip() for url in file if url.strip()]
 
+    def _split_downloaded(self, tiktok_video_urls: Iterable[str]):
+        """Collapse duplicate ids, then split into (pending, already downloaded)."""
+        unique = {}
+        for url in tiktok_video_urls:
+            unique.setdefault(self._video_id(url), url)
+        if self.force_download or self.manifest is None:
+            return list(unique.values()), []
+
+        pending, downloaded = [], []
+        for video_id, url in unique.items():
+            if self.manifest.is_done(video_id, url):
+                downloaded.append(url)
+            else:
+                pending.append(url)
+        return pending, downloaded
+
+    def skip_downloaded(self, tiktok_video_urls: list):
+        pending, downloaded = self._split_downloaded(tiktok_video_urls)
+        skipped = len(downloaded)
+        if skipped:
+            console.print(
+                f"Skipping '[green1]{skipped}[/]' videos already downloaded in earlier runs"
+            )
+        return pending
+
     def url_limiter(self, tiktok_video_urls: list):
         prompt_for_input = lambda message: Prompt.ask(message)
 
@@ -221,69 +622,248 @@ class VideoDownloader:
         self,
         session: aiohttp.ClientSession,
         url_limiter: list,
-        job_progress: Progress,
-        overall_progress: Progress,
-        overall_task: TaskID,
+        progress: TransferProgress,
         username: str,
         save_json: bool,
-        instant_clear: bool,
     ):
-        results_coro = [
-            self._get_tiktok_video_details(session, tiktok_video_url)
-            for tiktok_video_url in url_limiter
+        details_queue = asyncio.Queue()
+        videos_queue = asyncio.Queue(maxsize=self.scheduler.max_videos)
+        for tiktok_video_url in url_limiter:
+            details_queue.put_nowait(tiktok_video_url)
+        metadata = MetadataWriter(format=self.json_format) if save_json else None
+
+        resolvers = [
+            self._resolve_details(
+                session,
+                details_queue,
+                videos_queue,
+                metadata,
+                username,
+                progress,
+            )
+            for _ in range(min(self.scheduler.max_details, len(url_limiter)))
         ]
-        results = await asyncio.gather(*results_coro)
+        downloaders = [
+            asyncio.create_task(
+                self._download_bytes(
+                    session,
+                    videos_queue,
+                    progress,
+                )
+            )
+            for _ in range(self.scheduler.max_videos)
+        ]
+        try:
+            await asyncio.gather(
+                self._close_after(resolvers, videos_queue, len(downloaders)),
+                *downloaders,
+            )
+        finally:
+            for task in downloaders:
+                task.cancel()
+            if metadata:
+                metadata.close()
 
-        if save_json:
-            json_directory = "Tiktok JSON"
-            os.makedirs(json_directory, exist_ok=True)
-            if username:
-                filename = os.path.join(json_directory, f"{username}.json")
-            else:
-                filename = os.path.join(
-                    json_directory, f"{self.TXT_FILE.split('.')[0]}.json"
+    def _json_name(self, username: str, tiktok_video_url: str):
+        if username:
+            return username
+        elif self.TXT_FILE:
+            return self.TXT_FILE.split(".")[0]
+        return tiktok_video_url.split("@")[-1].split("/")[0]
+
+    async def _resolve_details(
+        self,
+        session: aiohttp.ClientSession,
+        details_queue: asyncio.Queue,
+        videos_queue: asyncio.Queue,
+        metadata: MetadataWriter | None,
+        username: str,
+        progress: TransferProgress,
+    ):
+        while not details_queue.empty():
+            tiktok_video_url = details_queue.get_nowait()
+            try:
+                result = await self.retry.run(
+                    self._get_tiktok_video_details, session, tiktok_video_url
+                )
+            except (Exception, TiktokException) as error:
+                self._record_failure(tiktok_video_url, error)
+                progress.advance(failed=True)
+                continue
+            if metadata:
+                metadata.write(self._json_name(username, tiktok_video_url), result)
+            self._emit(
+                VideoResolved(
+                    tiktok_video_url, self._video_id(tiktok_video_url), result
                 )
+            )
+            await videos_queue.put((result, tiktok_video_url))
 
-            with open(filename, "w") as file:
-                json.dump(results, file, indent=4)
+    async def _download_bytes(
+        self,
+        session: aiohttp.ClientSession,
+        videos_queue: asyncio.Queue,
+        progress: TransferProgress,
+    ):
+        while (item := await videos_queue.get()) is not None:
+            result, tiktok_video_url = item
+            try:
+                await self.retry.run(
+                    self._download_video,
+                    session,
+                    result,
+                    tiktok_video_url,
+                    progress,
+                )
+            except (Exception, TiktokException) as error:
+                self._record_failure(tiktok_video_url, error)
+                progress.advance(failed=True)
 
-        videos_coro = [
-            self._download_video(
-                session,
-                result,
-                tiktok_video_url,
-                job_progress,
-                overall_progress,
-                overall_task,
-                instant_clear,
+    def _record_failure(self, tiktok_video_url: str, error: BaseException):
+        reason = str(error) or type(error).__name__
+        self.failed.append((tiktok_video_url, reason))
+        metrics.count("videos", status="failed")
+        if self.manifest is not None:
+            self.manifest.mark_failed(
+                self._video_id(tiktok_video_url), tiktok_video_url, reason
             )
-            for result, tiktok_video_url in zip(results, url_limiter)
-        ]
-        await asyncio.gather(*videos_coro)
+        self._emit(
+            VideoFailed(tiktok_video_url, self._video_id(tiktok_video_url), reason)
+        )
+
+    def report_failures(self):
+        if not self.failed:
+            return
+        console.print(
+            f"\n[red1]Failed to download '{len(self.failed)}' videos[/], they will be retried on the next run:"
+        )
+        for tiktok_video_url, reason in self.failed:
+            console.print(f"  [blue1]{tiktok_video_url}[/] - {reason}")
+
+    async def stream(
+        self, tiktok_video_urls: Iterable[str], progress_step: int = 0
+    ) -> AsyncIterator[VideoEvent]:
+        """Download without prompts or terminal output, yielding events as they happen.
+
+        `progress_step` > 0 adds a VideoProgress event every that many bytes.
+        Use it inside `async with VideoDownloader(...)`.
+        """
+        pending, downloaded = self._split_downloaded(tiktok_video_urls)
+        for tiktok_video_url in downloaded:
+            yield VideoSkipped(tiktok_video_url, self._video_id(tiktok_video_url))
+        if not pending:
+            return
+
+        self.events = asyncio.Queue()
+        self.progress_step = progress_step
+        progress = TransferProgress(len(pending), mode="quiet")
+        pipeline = asyncio.create_task(self._stream_pipeline(pending, progress))
+        try:
+            while (event := await self.events.get()) is not None:
+                yield event
+            await pipeline
+        finally:
+            pipeline.cancel()
+            await asyncio.gather(pipeline, return_exceptions=True)
+            self.events = None
+
+    async def _stream_pipeline(
+        self, tiktok_video_urls: list, progress: TransferProgress
+    ):
+        try:
+            await self.download_videos(
+                self.client, tiktok_video_urls, progress, None, False
+            )
+        finally:
+            self.events.put_nowait(None)
+
+    @staticmethod
+    async def _close_after(resolvers: list, videos_queue: asyncio.Queue, workers: int):
+        """Wait for every detail resolver, then tell each download worker to stop."""
+        await asyncio.gather(*resolvers)
+        for _ in range(workers):
+            await videos_queue.put(None)
+
+
+async def _run_downloads(
+    downloader: VideoDownloader,
+    url_limiter: list,
+    username: str,
+    save_json: bool,
+    **display,
+):
+    async with TransferProgress(
+        len(url_limiter), label=downloader.bandwidth.describe(), **display
+    ) as progress:
+        await downloader.download_videos(
+            downloader.client, url_limiter, progress, username, save_json
+        )
+    downloader.report_failures()
+
+
+async def stream_videos(
+    tiktok_video_urls: Iterable[str], sink=None, progress_step: int = 0, **options
+) -> AsyncIterator[VideoEvent]:
+    """Programmatic entry point: no prompts, no terminal, one event per step.
+
+    `sink` decides where the bytes go (DiskSink by default, MemorySink or
+    CallbackSink from api.sinks); `options` are the VideoDownloader ones.
+
+        async for event in stream_videos(urls, sink=MemorySink()):
+            if isinstance(event, VideoDownloaded):
+                upload(event.video_id, event.data)
+    """
+    async with VideoDownloader(sink=sink, **options) as downloader:
+        async for event in downloader.stream(tiktok_video_urls, progress_step):
+            yield event
 
 
 async def AsyncDownloader(
-    username: str, save_json: bool, transient: bool, instant_clear: bool
+    username: str,
+    save_json: bool,
+    transient: bool,
+    instant_clear: bool,
+    progress_mode: str = "auto",
+    top_transfers: int = 10,
+    **options,
 ):
-    async with VideoDownloader() as downloader:
-        tiktok_video_urls = downloader.load_urls(username)
+    async with VideoDownloader(**options) as downloader:
+        tiktok_video_urls = downloader.skip_downloaded(downloader.load_urls(username))
         url_limiter = downloader.url_limiter(tiktok_video_urls)
-        job_progress, overall_progress = ProgressBar.setup_progress_bars()
-        overall_task = overall_progress.add_task(
-            "[yellow1]Overall progress...", total=len(url_limiter)
+        await _run_downloads(
+            downloader,
+            url_limiter,
+            username,
+            save_json,
+            transient=transient,
+            instant_clear=instant_clear,
+            mode=progress_mode,
+            top=top_transfers,
         )
-        with Live(
-            ProgressBar.create_progess_panel(job_progress, overall_progress),
-            refresh_per_second=10,
+
+
+async def AsyncBatchDownloader(
+    usernames: list,
+    save_json: bool,
+    transient: bool,
+    instant_clear: bool,
+    progress_mode: str = "auto",
+    top_transfers: int = 10,
+    **options,
+):
+    """Download the URL files of several accounts through one shared session."""
+    async with VideoDownloader(**options) as downloader:
+        tiktok_video_urls = []
+        for username in usernames:
+            tiktok_video_urls += downloader.load_urls(username)
+        url_limiter = downloader.skip_downloaded(list(dict.fromkeys(tiktok_video_urls)))
+        await _run_downloads(
+            downloader,
+            url_limiter,
+            None,
+            save_json,
             transient=transient,
-        ):
-            await downloader.download_videos(
-                downloader.client,
-                url_limiter,
-                job_progress,
-                overall_progress,
-                overall_task,
-                username,
-                save_json,
-                instant_clear,
-            )
+            instant_clear=instant_clear,
+            mode=progress_mode,
+            top=top_transfers,
+        )
@@ -1,39 +1,96 @@
-import os
 import time
-from collections import Counter
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import cv2 as cv
-import numpy as np
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webdriver import WebDriver
 
 from terminal.console import console
 
+if TYPE_CHECKING:
+    import numpy as np
+
 
 class CaptchaSolver:
+    MIN_X = 70
+
     @staticmethod
-    def _load_image():
-        """Load the image and convert it to grayscale."""
-        img = cv.imread("puzzle.png")
-        gray = cv.cvtColor(img, cv.COLOR_BGR2GRAY)
-        os.remove("puzzle.png")
-        return gray
+    def _load_image(png: bytes):
+        """Decode the PNG screenshot straight into a grayscale array."""
+        # OpenCV and NumPy load on the first captcha, not with the scraper
+        import cv2 as cv
+        import numpy as np
+
+        return cv.imdecode(np.frombuffer(png, np.uint8), cv.IMREAD_GRAYSCALE)
 
     @staticmethod
-    def _get_corners(gray: np.ndarray):
-        """Detect corners in the image."""
-        corners = cv.goodFeaturesToTrack(gray, 15, 0.05, 1)
-        return np.intp(corners)
+    def _load_piece(png: bytes):
+        """Decode the piece image in grayscale, over black where it is transparent."""
+        import cv2 as cv
+        import numpy as np
+
+        image = cv.imdecode(np.frombuffer(png, np.uint8), cv.IMREAD_UNCHANGED)
+        if image is None or image.ndim == 2:
+            return image
+        if image.shape[2] == 3:
+            return cv.cvtColor(image, cv.COLOR_BGR2GRAY)
+        gray = cv.cvtColor(image, cv.COLOR_BGRA2GRAY)
+        return (gray * (image[:, :, 3] / 255.0)).astype(np.uint8)
 
     @staticmethod
-    def _get_x_offset(corners: np.ndarray):
+    def _edges(gray: "np.ndarray"):
+        """Blur lightly, then keep the Canny edges."""
+        import cv2 as cv
+
+        return cv.Canny(cv.GaussianBlur(gray, (3, 3), 0), 100, 200)
+
+    @classmethod
+    def _match_piece(cls, gray: "np.ndarray", piece: "np.ndarray"):
+        """Find the gap by template matching the piece's edges on the background."""
+        import cv2 as cv
+        import numpy as np
+
+        piece_edges = cls._edges(piece)
+        ys, xs = np.nonzero(piece_edges)
+        if xs.size == 0:
+            return None
+        piece_edges = piece_edges[ys.min() : ys.max() + 1, xs.min() : xs.max() + 1]
+        background_edges = cls._edges(gray)
+        if (
+            piece_edges.shape[0] > background_edges.shape[0]
+            or piece_edges.shape[1] > background_edges.shape[1]
+        ):
+            return None
+        scores = cv.matchTemplate(background_edges, piece_edges, cv.TM_CCOEFF_NORMED)
+        scores[:, : cls.MIN_X] = -1
+        _, _, _, (x, _) = cv.minMaxLoc(scores)
+        return int(x - xs.min())
+
+    @classmethod
+    def _edge_profile_offset(cls, gray: "np.ndarray"):
+        """Find the gap's left border: the column with the most bright-to-dark edges.
+
+        The gap is shaded darker than the picture, so its left border is where
+        the horizontal gradient turns most strongly negative.
+        """
+        import cv2 as cv
+        import numpy as np
+
+        falling = np.maximum(-cv.Sobel(gray, cv.CV_32F, 1, 0, ksize=3), 0)
+        edges = cls._edges(gray).astype(bool)
+        profile = (falling * edges)[:, cls.MIN_X :].sum(axis=0)
+        if profile.size == 0 or profile.max() == 0:
+            return None
+        return int(np.argmax(profile)) + cls.MIN_X
+
+    @classmethod
+    def _get_x_offset(cls, gray: "np.ndarray", piece: "np.ndarray | None" = None):
         """Calculate the x offset for the slider."""
-        x_array = [i.ravel()[0] for i in corners if i.ravel()[0] > 70]
-        x_array.sort()
-        unic = Counter(x_array)
-        return next((x - 8 for x in x_array if unic[x] > 1), None)
+        if piece is not None:
+            x_offset = cls._match_piece(gray, piece)
+            if x_offset is not None:
+                return x_offset
+        return cls._edge_profile_offset(gray)
 
     @staticmethod
     def _perform_slide(driver: WebDriver, x_offset: Any):
@@ -66,10 +123,25 @@ class CaptchaSolver:
         return success
 
     @classmethod
-    def solve_puzzle(cls, driver: WebDriver):
-        """Main function to solve the captcha puzzle."""
-        gray = cls._load_image()
-        corners = cls._get_corners(gray)
-        x_offset = cls._get_x_offset(corners)
-        cls._perform_slide(driver, x_offset)
+    def solve_puzzle(
+        cls,
+        driver: WebDriver,
+        png: bytes,
+        piece_png: bytes | None = None,
+        display_width: float | None = None,
+        piece_left: float = 0.0,
+    ):
+        """Main function to solve the captcha puzzle.
+
+        The gap is found in the image's own pixels. The slider moves in CSS
+        pixels from where the piece starts, so the offset is scaled to the
+        `display_width` the puzzle is shown at and `piece_left` is taken off.
+        """
+        gray = cls._load_image(png)
+        piece = cls._load_piece(piece_png) if piece_png else None
+        x_offset = cls._get_x_offset(gray, piece)
+        if x_offset is None:
+            return False
+        scale = display_width / gray.shape[1] if display_width else 1.0
+        cls._perform_slide(driver, x_offset * scale - piece_left)
         return cls._check_verification(driver)
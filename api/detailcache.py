@@ -0,0 +1,126 @@
+import json
+import math
+import os
+import sqlite3
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs, urlsplit
+
+EXPIRY_PARAMETERS = ("x-expires", "expire")
+# Entries this close to expiry are refetched: the download still has to start
+EXPIRY_MARGIN = 120.0
+
+
+def url_expiry(url: str):
+    """Return the expiry epoch signed into a play URL's query string, if any."""
+    query = parse_qs(urlsplit(url).query)
+    for name in EXPIRY_PARAMETERS:
+        value = query.get(name, [""])[0]
+        if value.isdigit():
+            return float(value)
+    return None
+
+
+def play_expiry(details: dict):
+    """The earliest expiry among the play URLs of parsed video details."""
+    urls = [details.get("unwatermarked", "")]
+    urls += [variant["url"] for variant in details.get("variants") or []]
+    expiries = [expiry for url in urls if url and (expiry := url_expiry(url))]
+    return min(expiries, default=None)
+
+
+def is_expired(expires_at: float | None, now: float | None = None):
+    if expires_at is None:
+        return False
+    return expires_at - EXPIRY_MARGIN <= (now or time.time())
+
+
+class DetailCache:
+    """Parsed video details and cookies kept across runs, keyed by video id.
+
+    An entry is served until its play URLs expire, or for `ttl` seconds when
+    they carry no expiry, whichever comes first. Expired entries are dropped
+    on open, and the least recently used ones once there are more than
+    `max_entries`. A `path` of ":memory:" keeps them for one run only.
+    """
+
+    def __init__(
+        self,
+        path: str = os.path.join("Tiktok VIDEOS", "details.sqlite"),
+        ttl: float = 3600.0,
+        max_entries: int = 10000,
+    ):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS details (
+                id TEXT PRIMARY KEY,
+                details TEXT NOT NULL,
+                cookies TEXT,
+                expires_at REAL NOT NULL,
+                used_at REAL NOT NULL
+            )
+            """)
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS details_used_at ON details (used_at)"
+        )
+        self.connection.execute(
+            "DELETE FROM details WHERE expires_at <= ?", (time.time(),)
+        )
+        self.connection.commit()
+
+    def close(self):
+        self.connection.execute(
+            "DELETE FROM details WHERE id IN "
+            "(SELECT id FROM details ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self.connection.commit()
+        self.connection.close()
+
+    def get(self, video_id: str):
+        """Return the cached details, or None when missing or about to expire."""
+        row = self.connection.execute(
+            "SELECT details, cookies, expires_at FROM details WHERE id = ?",
+            (video_id,),
+        ).fetchone()
+        if row is None or is_expired(row[2]):
+            return None
+        self.connection.execute(
+            "UPDATE details SET used_at = ? WHERE id = ?", (time.time(), video_id)
+        )
+        self.connection.commit()
+        details = json.loads(row[0])
+        details["cookies"] = json.loads(row[1]) if row[1] else None
+        return details
+
+    def put(self, video_id: str, details: dict):
+        now = time.time()
+        expires_at = min(details.get("expires_at") or math.inf, now + self.ttl)
+        cookies = details.get("cookies")
+        if isinstance(cookies, SimpleCookie):
+            cookies = {name: morsel.value for name, morsel in cookies.items()}
+        fields = {
+            key: value
+            for key, value in details.items()
+            if key not in ("cookies", "variant")
+        }
+        self.connection.execute(
+            "INSERT INTO details (id, details, cookies, expires_at, used_at) "
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+            "details = excluded.details, cookies = excluded.cookies, "
+            "expires_at = excluded.expires_at, used_at = excluded.used_at",
+            (
+                video_id,
+                json.dumps(fields, separators=(",", ":")),
+                json.dumps(cookies) if cookies else None,
+                expires_at,
+                now,
+            ),
+        )
+        self.connection.commit()
@@ -0,0 +1,224 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+FSYNC_POLICIES = ("never", "close", "always")
+IOV_MAX = os.sysconf("SC_IOV_MAX") if hasattr(os, "sysconf") else 16
+
+
+def _pwrite_all(fd: int, chunks: list, offset: int):
+    """Write `chunks` back to back at `offset`, in one call when the OS allows."""
+    if hasattr(os, "pwritev") and len(chunks) <= IOV_MAX:
+        written = os.pwritev(fd, chunks, offset)
+        if written == sum(map(len, chunks)):
+            return
+        view = memoryview(b"".join(chunks))[written:]
+        offset += written
+    else:
+        view = memoryview(b"".join(chunks))
+    if not hasattr(os, "pwrite"):
+        # Windows: seeking is safe, every WriterFile has its own fd and lock
+        os.lseek(fd, offset, os.SEEK_SET)
+        while view:
+            view = view[os.write(fd, view) :]
+        return
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+class DiskWriter:
+    """Write video files from a few dedicated threads in large blocks.
+
+    Network chunks are small and many; handing each one to a thread costs more
+    than writing it. Every open file coalesces chunks into `buffer_size` blocks
+    and keeps one block in flight while the next one fills, so a file is always
+    written front to back and an interrupted `.part` never has holes.
+
+    At most `queue_size` blocks are queued or being written across all files.
+    A full queue makes `write` wait, which pauses the network reader instead of
+    buffering without bound. `preallocate` reserves the expected length with
+    `posix_fallocate` where the platform has it. `fsync` is "never", "close"
+    (before a finished file is moved into place) or "always" (after each block).
+    """
+
+    def __init__(
+        self,
+        buffer_size: int = 1 << 20,
+        queue_size: int = 64,
+        workers: int = 4,
+        preallocate: bool = False,
+        fsync: str = "never",
+    ):
+        self.buffer_size = buffer_size
+        self.queue_size = queue_size
+        self.workers = workers
+        self.preallocate = preallocate and hasattr(os, "posix_fallocate")
+        self.fsync = fsync
+        self.executor: ThreadPoolExecutor | None = None
+        self.slots: asyncio.Semaphore | None = None
+
+    async def submit(self, function, *args):
+        """Queue `function(*args)` for a writer thread and return its future."""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="disk-writer"
+            )
+            self.slots = asyncio.Semaphore(self.queue_size)
+        await self.slots.acquire()
+        future = asyncio.get_running_loop().run_in_executor(
+            self.executor, function, *args
+        )
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    async def open(self, path: str, offset: int, total: int | None = None):
+        """Open `path` for writing from `offset`, truncating it when that is 0."""
+        return await (await self.submit(self._open, path, offset, total))
+
+    def _open(self, path: str, offset: int, total: int | None):
+        fd = self._open_fd(path, truncate=offset == 0)
+        return WriterFile(self, fd, offset, self._reserve(fd, offset, total))
+
+    @staticmethod
+    def _open_fd(path: str, truncate: bool = False):
+        flags = os.O_WRONLY | os.O_CREAT | (os.O_TRUNC if truncate else 0)
+        return os.open(path, flags | getattr(os, "O_BINARY", 0), 0o644)
+
+    def _reserve(self, fd: int, offset: int, total: int | None):
+        if not (self.preallocate and total and total > offset):
+            return False
+        try:
+            os.posix_fallocate(fd, offset, total - offset)
+        except OSError:
+            # Not supported by this filesystem: write without it
+            return False
+        return True
+
+    async def open_segments(
+        self, path: str, bounds: list, total: int, truncate: bool = False
+    ):
+        """Open one WriterFile per (first, end) byte range of `path`."""
+        return await (
+            await self.submit(self._open_segments, path, bounds, total, truncate)
+        )
+
+    def _open_segments(self, path: str, bounds: list, total: int, truncate: bool):
+        fd = self._open_fd(path, truncate)
+        self._reserve(fd, bounds[0][0], total)
+        files = [WriterFile(self, fd, bounds[0][0], False)]
+        files += [
+            WriterFile(self, self._open_fd(path), first, False)
+            for first, _ in bounds[1:]
+        ]
+        return SegmentedFile(self, path, bounds, files)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+            self.slots = None
+
+
+class WriterFile:
+    """One file being written through a DiskWriter."""
+
+    def __init__(self, writer: DiskWriter, fd: int, position: int, preallocated: bool):
+        self.writer = writer
+        self.fd = fd
+        self.position = position
+        self.written = position
+        self.preallocated = preallocated
+        self.chunks = []
+        self.buffered = 0
+        self.in_flight: asyncio.Future | None = None
+        # Held by the thread touching fd, so a close can't overtake a write
+        self.lock = threading.Lock()
+
+    async def write(self, chunk: bytes):
+        self.chunks.append(chunk)
+        self.buffered += len(chunk)
+        if self.buffered >= self.writer.buffer_size:
+            await self.flush()
+
+    async def flush(self):
+        """Hand the buffered bytes to a writer thread once the previous block is out."""
+        if self.in_flight is not None:
+            in_flight, self.in_flight = self.in_flight, None
+            await in_flight
+        if not self.chunks:
+            return
+        chunks, size = self.chunks, self.buffered
+        self.chunks, self.buffered = [], 0
+        self.in_flight = await self.writer.submit(
+            self._write_block, chunks, self.position, size
+        )
+        self.position += size
+
+    def _write_block(self, chunks: list, offset: int, size: int):
+        with self.lock:
+            if self.fd is None:
+                return
+            _pwrite_all(self.fd, chunks, offset)
+            self.written = offset + size
+            if self.writer.fsync == "always":
+                os.fsync(self.fd)
+
+    async def close(self):
+        """Write out what is left and close, even if the caller is cancelled meanwhile."""
+        try:
+            await self.flush()
+            if self.in_flight is not None:
+                await self.in_flight
+        finally:
+            self.in_flight = None
+            await asyncio.get_running_loop().run_in_executor(
+                self.writer.executor, self._close
+            )
+
+    def _close(self):
+        with self.lock:
+            fd, self.fd = self.fd, None
+            try:
+                if self.preallocated:
+                    # Cut the reserved tail so the size is what was really written
+                    os.ftruncate(fd, self.written)
+                if self.writer.fsync != "never":
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+
+
+class SegmentedFile:
+    """Several WriterFiles filling separate byte ranges of one file at once.
+
+    Ranges finish out of order, so closing cuts the file after the first range
+    that is not complete: what is left is a prefix a resume can trust.
+    """
+
+    def __init__(self, writer: DiskWriter, path: str, bounds: list, files: list):
+        self.writer = writer
+        self.path = path
+        self.bounds = bounds
+        self.files = files
+
+    def complete_prefix(self):
+        end = self.bounds[0][0]
+        for (_, last), file in zip(self.bounds, self.files):
+            end = file.written
+            if end < last:
+                break
+        return end
+
+    async def close(self):
+        results = await asyncio.gather(
+            *(file.close() for file in self.files), return_exceptions=True
+        )
+        await asyncio.get_running_loop().run_in_executor(
+            self.writer.executor, os.truncate, self.path, self.complete_prefix()
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
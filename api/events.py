@@ -0,0 +1,46 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class VideoEvent:
+    """Base of everything `stream_videos` yields."""
+
+    url: str
+    video_id: str
+
+
+@dataclass
+class VideoSkipped(VideoEvent):
+    """Already downloaded in an earlier run, according to the manifest."""
+
+
+@dataclass
+class VideoResolved(VideoEvent):
+    """The detail page was parsed; `details` is what --save_json would write."""
+
+    details: dict = field(repr=False)
+
+
+@dataclass
+class VideoProgress(VideoEvent):
+    """Emitted every `progress_step` bytes when progress events are enabled."""
+
+    received: int
+    total: int
+
+
+@dataclass
+class VideoDownloaded(VideoEvent):
+    """All bytes arrived. `path` is set by the disk sink, `data` by the memory sink."""
+
+    size: int
+    sha256: str
+    path: str | None = None
+    data: bytes | None = field(default=None, repr=False)
+
+
+@dataclass
+class VideoFailed(VideoEvent):
+    """Gave up after the retry policy ran out; the manifest marks it failed."""
+
+    error: str
@@ -0,0 +1,102 @@
+import json
+from datetime import datetime
+
+from exception import ScriptTagNotFoundError
+
+SCRIPT_ID = "__UNIVERSAL_DATA_FOR_REHYDRATION__"
+
+
+def find_rehydration_script(html: str):
+    """Return the raw JSON text of the rehydration script tag, or None if not found.
+
+    This only scans the page for the tag instead of building a DOM.
+    """
+    search_from = 0
+    while (marker := html.find(SCRIPT_ID, search_from)) != -1:
+        search_from = marker + len(SCRIPT_ID)
+        tag_start = html.rfind("<", 0, marker)
+        tag_end = html.find(">", marker)
+        if (
+            tag_start == -1
+            or tag_end == -1
+            or not html.startswith("<script", tag_start)
+            or ">" in html[tag_start:marker]
+        ):
+            continue
+        close = html.find("</script>", tag_end)
+        if close == -1:
+            return None
+        return html[tag_end + 1 : close]
+    return None
+
+
+def _find_with_soup(html: str):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "lxml")
+    script_tag = soup.select_one(f"script#{SCRIPT_ID}")
+    if script_tag and script_tag.contents:
+        return script_tag.contents[0]
+    return None
+
+
+def extract_rehydration_data(html: str):
+    """Decode the rehydration JSON, falling back to a full BeautifulSoup parse."""
+    payload = find_rehydration_script(html)
+    if payload is not None:
+        try:
+            return json.loads(payload)
+        except ValueError:
+            pass
+
+    payload = _find_with_soup(html)
+    if payload is None:
+        raise ScriptTagNotFoundError("Script tag is not found.")
+    return json.loads(payload)
+
+
+def parse_variants(video_dict: dict):
+    """Flatten `bitrateInfo` into one dict per downloadable rendition."""
+    variants = []
+    for info in video_dict.get("bitrateInfo") or []:
+        play_addr = info.get("PlayAddr") or {}
+        urls = play_addr.get("UrlList") or []
+        if not urls:
+            continue
+        variants.append(
+            {
+                "gear": info.get("GearName", ""),
+                "codec": info.get("CodecType", ""),
+                "bitrate": info.get("Bitrate") or 0,
+                "width": play_addr.get("Width") or 0,
+                "height": play_addr.get("Height") or 0,
+                "size": int(play_addr.get("DataSize") or 0),
+                "url": urls[0],
+            }
+        )
+    return variants
+
+
+def parse_video_details(html: str):
+    """Pull the fields we keep from a video detail page.
+
+    This is a plain module-level function so it can run in a thread or process pool.
+    """
+    universal = extract_rehydration_data(html)
+    default_scope = universal.get("__DEFAULT_SCOPE__", {})
+    video_details = default_scope.get("webapp.video-detail", {})
+    video_info = video_details.get("itemInfo", {}).get("itemStruct", {})
+    video_dict = video_info.get("video", {})
+
+    return {
+        "id": video_info.get("id", ""),
+        "desc": video_info.get("desc", ""),
+        "createTime": datetime.utcfromtimestamp(
+            int(video_info.get("createTime", 0))
+        ).strftime("%Y-%m-%d %H:%M:%S"),
+        "unwatermarked": video_dict.get("playAddr", ""),
+        "watermarked": video_dict.get("downloadAddr", ""),
+        "bitrate": video_dict.get("bitrate", ""),
+        "author": video_info.get("author", {}),
+        "variants": parse_variants(video_dict),
+    }
@@ -0,0 +1,106 @@
+import aiohttp
+from user_agent import generate_user_agent
+
+from exception import AccountNotFoundError, ItemListUnavailableError
+from terminal.console import console
+
+from .extractor import extract_rehydration_data
+from .links import sanitize_channel_url, save_video_links
+from .retry import RetryPolicy
+
+
+class ItemListScraper:
+    """Collect a profile's video links through the item list API, without a browser.
+
+    ``base_url`` can point at a local stand-in server to run this offline.
+    """
+
+    ITEM_LIST_PATH = "/api/post/item_list/"
+
+    def __init__(
+        self,
+        channel_url: str,
+        base_url: str = "https://www.tiktok.com",
+        page_size: int = 35,
+    ):
+        self.channel_url = sanitize_channel_url(channel_url)
+        self.base_url = base_url.rstrip("/")
+        self.page_size = page_size
+        self.headers = {
+            "User-Agent": generate_user_agent(),
+            "Referer": f"{self.base_url}/",
+        }
+        self.retry = RetryPolicy()
+
+    @property
+    def get_username(self):
+        return self.channel_url.split("@")[-1]
+
+    async def _get_sec_uid(self, session: aiohttp.ClientSession):
+        async with session.get(f"{self.base_url}/@{self.get_username}") as response:
+            response.raise_for_status()
+            html = await response.text()
+        default_scope = extract_rehydration_data(html).get("__DEFAULT_SCOPE__", {})
+        user_detail = default_scope.get("webapp.user-detail", {})
+        user = user_detail.get("userInfo", {}).get("user", {})
+        if not user.get("secUid"):
+            raise AccountNotFoundError(
+                f"Couldn't find this account '{self.channel_url}'"
+            )
+        if user.get("privateAccount"):
+            raise AccountNotFoundError(f"This account is private '{self.channel_url}'")
+        return user["secUid"]
+
+    async def _get_page(self, session: aiohttp.ClientSession, sec_uid: str, cursor):
+        params = {
+            "aid": "1988",
+            "secUid": sec_uid,
+            "count": str(self.page_size),
+            "cursor": str(cursor),
+        }
+        async with session.get(
+            f"{self.base_url}{self.ITEM_LIST_PATH}", params=params
+        ) as response:
+            response.raise_for_status()
+            if not await response.read():
+                raise ItemListUnavailableError(
+                    "The item list API returned an empty response, use the browser mode instead."
+                )
+            return await response.json(content_type=None)
+
+    async def collect_links(self):
+        video_links = []
+        seen = set()
+        async with aiohttp.ClientSession(headers=self.headers) as session:
+            sec_uid = await self.retry.run(self._get_sec_uid, session)
+            cursor = 0
+            with console.status(
+                "[cyan]Paging through the item list..[/]",
+                spinner="point",
+                spinner_style="magenta",
+            ) as status:
+                while True:
+                    page = await self.retry.run(
+                        self._get_page, session, sec_uid, cursor
+                    )
+                    for item in page.get("itemList") or []:
+                        if item["id"] in seen:
+                            continue
+                        seen.add(item["id"])
+                        author = item.get("author", {}).get(
+                            "uniqueId", self.get_username
+                        )
+                        video_links.append(
+                            f"{self.base_url}/@{author}/video/{item['id']}"
+                        )
+                    status.update(
+                        f"[cyan]Paging through the item list..[/] {len(video_links)} links"
+                    )
+                    if not page.get("hasMore") or not page.get("itemList"):
+                        break
+                    cursor = page["cursor"]
+        return video_links
+
+    async def scrape_video_link(self):
+        video_links = await self.collect_links()
+        save_video_links(self.get_username, video_links)
@@ -0,0 +1,33 @@
+import os
+
+from exception import InvalidUrlError
+from terminal.console import console
+
+
+def sanitize_channel_url(tiktok_channel: str):
+    base_url = "https://www.tiktok.com/@"
+
+    if tiktok_channel.startswith(base_url):
+        return tiktok_channel
+    elif tiktok_channel.startswith("@"):
+        return base_url + tiktok_channel[1:]
+    elif tiktok_channel.isalnum():
+        return base_url + tiktok_channel
+    else:
+        raise InvalidUrlError(f"'{tiktok_channel}' is not a valid input!")
+
+
+def save_video_links(username: str, video_links: list):
+    """Write the links to 'Tiktok URL/<username>.txt', the input of the downloader."""
+    data = "\n".join(video_links)
+
+    url_directory = "Tiktok URL"
+    os.makedirs(url_directory, exist_ok=True)
+    filename = os.path.join(url_directory, f"{username}.txt")
+
+    with open(filename, "w", encoding="utf-8") as file:
+        file.write(data)
+
+    console.print(
+        f'\n{len(video_links)} links has been saved in "[blue1]{filename}[/]"\n'
+    )
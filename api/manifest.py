@@ -0,0 +1,134 @@
+import glob
+import os
+import sqlite3
+import time
+
+
+class DownloadManifest:
+    """Keep track of downloaded videos across runs, keyed by video id.
+
+    A video found on disk from before the manifest existed is only "adopted":
+    it may be what an interrupted run left behind, so it is resumed like a
+    .part and trusted once the server's length confirms it.
+    """
+
+    def __init__(self, path: str = os.path.join("Tiktok VIDEOS", "manifest.sqlite")):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS videos (
+                id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                path TEXT,
+                size INTEGER,
+                sha256 TEXT,
+                status TEXT NOT NULL,
+                error TEXT,
+                updated_at REAL NOT NULL
+            )
+            """)
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS videos_sha256 ON videos (sha256, size)"
+        )
+        # Earlier versions marked adopted files done, with no checksum
+        self.connection.execute(
+            "UPDATE videos SET status = 'adopted' "
+            "WHERE status = 'done' AND sha256 IS NULL"
+        )
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def _upsert(self, video_id: str, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(["id", *fields])
+        placeholders = ", ".join("?" for _ in range(len(fields) + 1))
+        updates = ", ".join(f"{column} = excluded.{column}" for column in fields)
+        self.connection.execute(
+            f"INSERT INTO videos ({columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}",
+            (video_id, *fields.values()),
+        )
+        self.connection.commit()
+
+    def is_done(self, video_id: str, tiktok_video_url: str):
+        """Return True when the video is on disk with the size we recorded for it."""
+        row = self.connection.execute(
+            "SELECT path, size, status FROM videos WHERE id = ?",
+            (video_id,),
+        ).fetchone()
+        if row is None:
+            return self._adopt_existing(video_id, tiktok_video_url)
+        path, size, status = row
+        return (
+            status == "done" and os.path.isfile(path) and os.path.getsize(path) == size
+        )
+
+    def _adopt_existing(self, video_id: str, tiktok_video_url: str):
+        """Record a video downloaded before the manifest existed, still unverified."""
+        username = tiktok_video_url.split("@")[-1].split("/")[0]
+        pattern = os.path.join(
+            "Tiktok VIDEOS", glob.escape(username), f"video-{video_id}-*.mp4"
+        )
+        existing = glob.glob(pattern)
+        if existing:
+            self._upsert(
+                video_id,
+                url=tiktok_video_url,
+                path=existing[0],
+                size=os.path.getsize(existing[0]),
+                sha256=None,
+                status="adopted",
+                error=None,
+            )
+        return False
+
+    def adopted_path(self, video_id: str):
+        """Return the unverified file adopted for this video, if it is still there."""
+        row = self.connection.execute(
+            "SELECT path FROM videos WHERE id = ? AND status = 'adopted'",
+            (video_id,),
+        ).fetchone()
+        return row[0] if row and os.path.isfile(row[0]) else None
+
+    def mark_done(
+        self, video_id: str, url: str, path: str, size: int, sha256: str | None
+    ):
+        self._upsert(
+            video_id,
+            url=url,
+            path=path,
+            size=size,
+            sha256=sha256,
+            status="done",
+            error=None,
+        )
+
+    def mark_failed(self, video_id: str, url: str, error: str):
+        self._upsert(video_id, url=url, status="failed", error=error)
+
+    def find_content(self, sha256: str, size: int, video_id: str):
+        """Return the path of another video on disk with exactly this content."""
+        rows = self.connection.execute(
+            "SELECT path FROM videos WHERE sha256 = ? AND size = ? "
+            "AND status = 'done' AND id != ?",
+            (sha256, size, video_id),
+        )
+        for (path,) in rows:
+            if os.path.isfile(path) and os.path.getsize(path) == size:
+                return path
+        return None
+
+    def done_videos(self):
+        return self.connection.execute(
+            "SELECT id, url, path, size, sha256 FROM videos WHERE status = 'done'"
+        ).fetchall()
+
+    def count_adopted(self):
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM videos WHERE status = 'adopted'"
+        ).fetchone()[0]
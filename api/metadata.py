@@ -0,0 +1,117 @@
+import gzip
+import json
+import os
+from http.cookies import SimpleCookie
+
+METADATA_FORMATS = {"ndjson": ".ndjson", "gzip": ".ndjson.gz"}
+
+
+class MetadataWriter:
+    """Append one NDJSON line per resolved video, grouped into a file per account.
+
+    Lines are flushed as they are written, so an interrupted run still leaves
+    every record it got to. `close` then rewrites each touched file keeping only
+    the newest record per video id, which also folds in earlier runs.
+
+    A gzip stream cut off by a crash cannot be appended to, so the gzip format
+    streams into a plain `.part` journal and only compresses on merge.
+
+    Earlier versions wrote a JSON array to `<name>.json`; merges fold its records
+    in as the oldest ones, and leave the array alone.
+    """
+
+    def __init__(self, directory: str = "Tiktok JSON", format: str = "ndjson"):
+        self.directory = directory
+        self.compressed = format == "gzip"
+        self.extension = METADATA_FORMATS[format]
+        self.files = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name: str):
+        return os.path.join(self.directory, f"{name}{self.extension}")
+
+    def _stream_path(self, name: str):
+        path = self._path(name)
+        return f"{path}.part" if self.compressed else path
+
+    @staticmethod
+    def _serializable(result: dict):
+        cookies = result.get("cookies")
+        if isinstance(cookies, SimpleCookie):
+            cookies = {name: morsel.value for name, morsel in cookies.items()}
+        return {**result, "cookies": cookies} if cookies else result
+
+    @staticmethod
+    def _open_append(path: str):
+        file = open(path, "a+", encoding="utf-8")
+        if file.tell():
+            file.seek(file.tell() - 1)
+            if file.read(1) != "\n":
+                # Finish a line left half-written by an interrupted run
+                file.write("\n")
+        return file
+
+    def write(self, name: str, result: dict):
+        if name not in self.files:
+            self.files[name] = self._open_append(self._stream_path(name))
+        file = self.files[name]
+        file.write(json.dumps(self._serializable(result), separators=(",", ":")) + "\n")
+        file.flush()
+
+    def _legacy_lines(self, name: str):
+        path = os.path.join(self.directory, f"{name}.json")
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                records = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return
+        for record in records if isinstance(records, list) else []:
+            if isinstance(record, dict):
+                yield json.dumps(record, separators=(",", ":")) + "\n"
+
+    def _read_lines(self, name: str):
+        yield from self._legacy_lines(name)
+        sources = [self._path(name)]
+        if self.compressed:
+            sources.append(self._stream_path(name))
+        for path in sources:
+            if not os.path.exists(path):
+                continue
+            opener = gzip.open if path.endswith(".gz") else open
+            with opener(path, "rt", encoding="utf-8") as file:
+                yield from file
+
+    @staticmethod
+    def _record_id(line: str):
+        try:
+            return json.loads(line).get("id")
+        except json.JSONDecodeError:
+            return None
+
+    def merge(self, name: str):
+        """Deduplicate by video id in two passes, holding only ids in memory."""
+        latest = {}
+        for index, line in enumerate(self._read_lines(name)):
+            video_id = self._record_id(line)
+            if video_id is not None:
+                latest[video_id] = index
+
+        keep = set(latest.values())
+        path = self._path(name)
+        merged = f"{path}.tmp"
+        opener = gzip.open if self.compressed else open
+        with opener(merged, "wt", encoding="utf-8") as output:
+            for index, line in enumerate(self._read_lines(name)):
+                if index in keep:
+                    output.write(line if line.endswith("\n") else f"{line}\n")
+        os.replace(merged, path)
+        if self.compressed:
+            os.remove(self._stream_path(name))
+
+    def close(self):
+        for name, file in self.files.items():
+            file.close()
+            self.merge(name)
+        self.files.clear()
@@ -0,0 +1,149 @@
+import json
+import math
+import os
+import time
+from contextlib import contextmanager
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, math.inf)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram, cheap enough to update on every request."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        for index, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float):
+        """Upper bound of the bucket holding the q-th observation."""
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            cumulative += count
+            if cumulative >= target and count:
+                return min(bound, self.max)
+        return self.max
+
+
+class Metrics:
+    """Per-stage latency, concurrency and byte counters for one run."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.histograms = {}
+        self.counters = {}
+        self.in_flight = {}
+        self.peak_in_flight = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time one unit of work and track how many run at once."""
+        self.in_flight[name] = self.in_flight.get(name, 0) + 1
+        self.peak_in_flight[name] = max(
+            self.peak_in_flight.get(name, 0), self.in_flight[name]
+        )
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+            self.in_flight[name] -= 1
+
+    def observe(self, name: str, seconds: float):
+        self.histograms.setdefault(name, Histogram()).observe(seconds)
+
+    def count(self, name: str, value: int = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def counter(self, name: str):
+        return sum(
+            value for (counter, _), value in self.counters.items() if counter == name
+        )
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started
+        transfer = self.histograms.get("transfer")
+        downloaded = self.counter("bytes_downloaded")
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "bytes_downloaded": downloaded,
+            "bytes_per_second": round(downloaded / elapsed, 1) if elapsed else 0,
+            "bytes_per_second_per_transfer": (
+                round(downloaded / transfer.sum, 1) if transfer and transfer.sum else 0
+            ),
+            "stages": {
+                name: {
+                    "count": histogram.count,
+                    "mean_seconds": round(histogram.sum / histogram.count, 6),
+                    "p50_seconds": round(histogram.quantile(0.5), 6),
+                    "p99_seconds": round(histogram.quantile(0.99), 6),
+                    "max_seconds": round(histogram.max, 6),
+                    "peak_in_flight": self.peak_in_flight.get(name, 0),
+                }
+                for name, histogram in self.histograms.items()
+                if histogram.count
+            },
+            "counters": {
+                name + "".join(f"[{k}={v}]" for k, v in labels): value
+                for (name, labels), value in self.counters.items()
+            },
+        }
+
+    def write_summary(self, filename: str):
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(filename, "w") as file:
+            json.dump(self.summary(), file, indent=4)
+
+    def prometheus(self):
+        """Render everything in the Prometheus text exposition format."""
+        lines = []
+        for name, histogram in self.histograms.items():
+            metric = f"tikudown_{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(BUCKETS, histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else bound
+                lines.append(f'{metric}_bucket{{le="{le}"}} {cumulative}')
+            lines.append(f"{metric}_sum {histogram.sum}")
+            lines.append(f"{metric}_count {histogram.count}")
+        for (name, labels), value in self.counters.items():
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            label_text = f"{{{label_text}}}" if label_text else ""
+            lines.append(f"tikudown_{name}_total{label_text} {value}")
+        for name, value in self.in_flight.items():
+            lines.append(f'tikudown_in_flight{{stage="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+async def serve_metrics(port: int):
+    """Expose /metrics on localhost for the duration of the run."""
+    from aiohttp import web
+
+    async def handle(_):
+        return web.Response(text=metrics.prometheus(), content_type="text/plain")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+"""Create a metrics registry once"""
+metrics = Metrics()
@@ -0,0 +1,117 @@
+import asyncio
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+
+from exception import (
+    IncompleteDownloadError,
+    PlayUrlExpiredError,
+    ScriptTagNotFoundError,
+)
+
+from .metrics import metrics
+
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+RETRY_ERRORS = (
+    aiohttp.ClientError,
+    asyncio.TimeoutError,
+    ScriptTagNotFoundError,
+    IncompleteDownloadError,
+    PlayUrlExpiredError,
+)
+
+
+class CircuitBreaker:
+    """Pause every request for a while when too many recent requests failed."""
+
+    def __init__(
+        self,
+        window: int = 50,
+        min_samples: int = 10,
+        threshold: float = 0.5,
+        cooldown: float = 15.0,
+    ):
+        self.outcomes = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.open_until = 0.0
+        self.trips = 0
+
+    def record(self, success: bool):
+        self.outcomes.append(success)
+        if len(self.outcomes) < self.min_samples:
+            return
+        error_rate = self.outcomes.count(False) / len(self.outcomes)
+        if error_rate >= self.threshold:
+            self.open_until = time.monotonic() + self.cooldown
+            self.outcomes.clear()
+            self.trips += 1
+            metrics.count("circuit_breaker_trips")
+
+    async def wait(self):
+        while (delay := self.open_until - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+
+
+class RetryPolicy:
+    """Retry transient failures with exponential backoff, jitter and Retry-After."""
+
+    def __init__(
+        self,
+        retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+
+    @staticmethod
+    def _retry_after(error: aiohttp.ClientResponseError):
+        value = (error.headers or {}).get("Retry-After")
+        if not value:
+            return None
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _delay(self, attempt: int, error: BaseException):
+        """Return how long to wait before the next attempt, or None to give up."""
+        if isinstance(error, aiohttp.ClientResponseError):
+            if error.status not in RETRY_STATUSES:
+                return None
+            retry_after = self._retry_after(error)
+            if retry_after is not None:
+                return min(retry_after, self.max_delay)
+        backoff = min(self.max_delay, self.base_delay * 2**attempt)
+        return random.uniform(backoff / 2, backoff)
+
+    async def run(self, operation, *args):
+        attempt = 0
+        while True:
+            await self.breaker.wait()
+            try:
+                result = await operation(*args)
+            except RETRY_ERRORS as error:
+                delay = self._delay(attempt, error)
+                if delay is None:
+                    raise
+                # A 404 says nothing about the host's health: don't trip on it
+                self.breaker.record(False)
+                if attempt >= self.retries:
+                    raise
+                attempt += 1
+                metrics.count("retries", operation=operation.__name__.strip("_"))
+                await asyncio.sleep(delay)
+            else:
+                self.breaker.record(True)
+                return result
@@ -0,0 +1,56 @@
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+
+class DownloadScheduler:
+    """Bound how many detail fetches and video transfers run at the same time."""
+
+    def __init__(self, max_details: int, max_videos: int, max_per_host: int):
+        self.max_details = max_details
+        self.max_videos = max_videos
+        self.max_per_host = max_per_host
+        self._detail_limit = asyncio.Semaphore(max_details)
+        self._video_limit = asyncio.Semaphore(max_videos)
+        self._host_limits = defaultdict(lambda: asyncio.Semaphore(self.max_per_host))
+
+    @asynccontextmanager
+    async def _acquire(self, limit: asyncio.Semaphore, url: str):
+        """Take the per-host slot first so a busy host never holds a global slot."""
+        if self.max_per_host > 0:
+            async with self._host_limits[urlsplit(url).hostname]:
+                async with limit:
+                    yield
+        else:
+            async with limit:
+                yield
+
+    def detail_slot(self, url: str):
+        """Reserve a slot for fetching one video detail page."""
+        return self._acquire(self._detail_limit, url)
+
+    def video_slot(self, url: str):
+        """Reserve a slot for streaming one video file."""
+        return self._acquire(self._video_limit, url)
+
+    @asynccontextmanager
+    async def spare_host_slots(self, url: str, wanted: int):
+        """Take up to `wanted` more per-host slots, only those free right now.
+
+        Yields how many were taken. Waiting here while holding a slot could
+        deadlock transfers that each want more connections to the same host.
+        """
+        if self.max_per_host <= 0:
+            yield wanted
+            return
+        limit = self._host_limits[urlsplit(url).hostname]
+        taken = 0
+        try:
+            while taken < wanted and not limit.locked():
+                await limit.acquire()
+                taken += 1
+            yield taken
+        finally:
+            for _ in range(taken):
+                limit.release()
@@ -0,0 +1,40 @@
+from itertools import cycle
+
+import aiohttp
+
+
+class ProxyRotator:
+    """Hand out proxies from a text file (one URL per line) in round-robin order."""
+
+    def __init__(self, proxy_file: str | None):
+        self.proxies = []
+        if proxy_file:
+            with open(proxy_file, "r") as file:
+                self.proxies = [line.strip() for line in file if line.strip()]
+        self._cycle = cycle(self.proxies) if self.proxies else None
+
+    def next(self):
+        return next(self._cycle) if self._cycle else None
+
+
+def build_session(
+    pool_size: int,
+    max_per_host: int,
+    dns_ttl: int,
+    keepalive: float,
+    connect_timeout: float,
+    read_timeout: float,
+):
+    """Create the ClientSession shared by the detail and video requests."""
+    connector = aiohttp.TCPConnector(
+        limit=pool_size,
+        limit_per_host=max_per_host,
+        use_dns_cache=dns_ttl > 0,
+        ttl_dns_cache=dns_ttl or None,
+        keepalive_timeout=keepalive,
+        enable_cleanup_closed=True,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=None, connect=connect_timeout, sock_read=read_timeout
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
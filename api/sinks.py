@@ -0,0 +1,256 @@
+import asyncio
+import hashlib
+import inspect
+import io
+import os
+
+from .diskwriter import DiskWriter
+from .manifest import DownloadManifest
+from .metrics import metrics
+
+
+def hash_file(filename: str):
+    """Hash an existing partial file so a resumed download can keep hashing."""
+    hasher = hashlib.sha256()
+    with open(filename, "rb") as file:
+        while block := file.read(1 << 20):
+            hasher.update(block)
+    return hasher
+
+
+class DiskSink:
+    """Save videos under 'Tiktok VIDEOS/<user>', resuming from .part files.
+
+    This is what the command line uses. Finished videos are recorded in the
+    manifest, and content already on disk under another id is hardlinked;
+    without a manifest, files are just moved into place.
+    Bytes go through `writer`, shared by every video of the run.
+    """
+
+    persistent = True
+
+    def __init__(
+        self,
+        manifest: DownloadManifest | None,
+        directory: str = "Tiktok VIDEOS",
+        writer: DiskWriter | None = None,
+    ):
+        self.manifest = manifest
+        self.directory = directory
+        self.writer = writer or DiskWriter()
+
+    def filename(self, tiktok_video_url: str, video_id: str, create_time: str):
+        username = tiktok_video_url.split("@")[-1].split("/")[0]
+        video_date = create_time.split(" ")[0]
+        user_directory = os.path.join(self.directory, username)
+        os.makedirs(user_directory, exist_ok=True)
+        return f"{user_directory}/video-{video_id}-{video_date}.mp4"
+
+    def target(self, tiktok_video_url: str, video_id: str, create_time: str):
+        filename = self.filename(tiktok_video_url, video_id, create_time)
+        return DiskTarget(self, tiktok_video_url, video_id, filename)
+
+    def store(
+        self,
+        part_filename: str,
+        filename: str,
+        video_id: str,
+        tiktok_video_url: str,
+        size: int,
+        sha256: str,
+    ):
+        """Move a finished part into place, sharing storage with identical videos."""
+        os.replace(part_filename, filename)
+        if self.manifest is None:
+            return
+        original = self.manifest.find_content(sha256, size, video_id)
+        if original and os.path.abspath(original) != os.path.abspath(filename):
+            self._link_duplicate(original, filename, size)
+        self.manifest.mark_done(video_id, tiktok_video_url, filename, size, sha256)
+
+    @staticmethod
+    def _link_duplicate(original: str, filename: str, size: int):
+        link = f"{filename}.link"
+        try:
+            if os.path.exists(link):
+                os.remove(link)
+            os.link(original, link)
+            os.replace(link, filename)
+        except OSError:
+            # No hardlinks here (other volume, FAT, ...): keep the separate copy
+            return
+        metrics.count("bytes_deduplicated", size)
+
+
+class DiskTarget:
+    """One video on its way to disk through a .part file.
+
+    Preallocated and segmented downloads are written to a .alloc file instead,
+    because its size says nothing about how much arrived if the process dies.
+    It becomes the .part, cut to the bytes known to be written, when it is
+    closed; one left behind by a crash is thrown away.
+    """
+
+    segmentable = True
+
+    def __init__(
+        self, sink: DiskSink, tiktok_video_url: str, video_id: str, filename: str
+    ):
+        self.sink = sink
+        self.tiktok_video_url = tiktok_video_url
+        self.video_id = video_id
+        self.filename = filename
+        self.part_filename = f"{filename}.part"
+        self.alloc_filename = f"{filename}.alloc"
+        if os.path.exists(self.alloc_filename):
+            os.remove(self.alloc_filename)
+        adopted = sink.manifest.adopted_path(video_id) if sink.manifest else None
+        if adopted and not os.path.exists(self.part_filename):
+            # Resumed like any .part: a 416 for its length proves it whole
+            os.replace(adopted, self.part_filename)
+        self.offset = (
+            os.path.getsize(self.part_filename)
+            if os.path.exists(self.part_filename)
+            else 0
+        )
+        self.file = None
+
+    async def open(self, start: int, total: int | None = None):
+        """Open for writing at `start` and return a hasher covering the bytes before it."""
+        hasher = (
+            await asyncio.to_thread(hash_file, self.part_filename)
+            if start
+            else hashlib.sha256()
+        )
+        filename = self.part_filename
+        if self.sink.writer.preallocate and total:
+            if start:
+                os.replace(self.part_filename, self.alloc_filename)
+            filename = self.alloc_filename
+        self.file = await self.sink.writer.open(filename, start, total)
+        return hasher
+
+    async def open_segments(self, start: int, total: int, bounds: list):
+        """Open one writer per (first, end) byte range, to be filled concurrently."""
+        if start:
+            os.replace(self.part_filename, self.alloc_filename)
+        self.file = await self.sink.writer.open_segments(
+            self.alloc_filename, bounds, total, truncate=not start
+        )
+        return self.file.files
+
+    async def checksum(self):
+        """Hash the closed .part, for downloads not written front to back."""
+        return (await asyncio.to_thread(hash_file, self.part_filename)).hexdigest()
+
+    async def write(self, chunk: bytes):
+        await self.file.write(chunk)
+
+    async def close(self):
+        if self.file is None:
+            return
+        try:
+            await self.file.close()
+        finally:
+            self.file = None
+            if os.path.exists(self.alloc_filename):
+                os.replace(self.alloc_filename, self.part_filename)
+
+    def commit(self, size: int, sha256: str):
+        self.sink.store(
+            self.part_filename,
+            self.filename,
+            self.video_id,
+            self.tiktok_video_url,
+            size,
+            sha256,
+        )
+        return {"path": self.filename}
+
+    def discard(self):
+        if os.path.exists(self.part_filename):
+            os.remove(self.part_filename)
+
+
+class MemorySink:
+    """Keep every video in memory; the finished event carries its bytes."""
+
+    persistent = False
+
+    def target(self, tiktok_video_url: str, video_id: str, create_time: str):
+        return MemoryTarget(video_id)
+
+
+class MemoryTarget:
+    offset = 0
+    segmentable = False
+
+    def __init__(self, video_id: str):
+        self.video_id = video_id
+        self.buffer = io.BytesIO()
+
+    async def open(self, start: int, total: int | None = None):
+        self.buffer = io.BytesIO()
+        return hashlib.sha256()
+
+    async def write(self, chunk: bytes):
+        self.buffer.write(chunk)
+
+    async def close(self):
+        pass
+
+    def commit(self, size: int, sha256: str):
+        return {"data": self.buffer.getvalue()}
+
+    def discard(self):
+        self.buffer = io.BytesIO()
+
+
+class CallbackSink:
+    """Hand each chunk to `on_chunk(video_id, chunk)`, a function or coroutine.
+
+    A failed attempt is retried from the first byte, so the callback sees
+    `on_chunk(video_id, None)` before a retry starts over.
+    """
+
+    persistent = False
+
+    def __init__(self, on_chunk):
+        self.on_chunk = on_chunk
+        self.started = set()
+
+    def target(self, tiktok_video_url: str, video_id: str, create_time: str):
+        return CallbackTarget(self, video_id)
+
+
+class CallbackTarget:
+    offset = 0
+    segmentable = False
+
+    def __init__(self, sink: CallbackSink, video_id: str):
+        self.sink = sink
+        self.video_id = video_id
+
+    async def _call(self, chunk: bytes | None):
+        result = self.sink.on_chunk(self.video_id, chunk)
+        if inspect.isawaitable(result):
+            await result
+
+    async def open(self, start: int, total: int | None = None):
+        if self.video_id in self.sink.started:
+            await self._call(None)
+        self.sink.started.add(self.video_id)
+        return hashlib.sha256()
+
+    async def write(self, chunk: bytes):
+        await self._call(chunk)
+
+    async def close(self):
+        pass
+
+    def commit(self, size: int, sha256: str):
+        self.sink.started.discard(self.video_id)
+        return {}
+
+    def discard(self):
+        pass
@@ -0,0 +1,74 @@
+import asyncio
+import re
+import time
+from urllib.parse import urlsplit
+
+RATE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmg]?)i?b?(?:/s)?\s*$", re.I)
+RATE_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3}
+
+
+def parse_rate(value: str):
+    """Turn '500K', '2M' or '1.5MB/s' into bytes per second."""
+    match = RATE_PATTERN.match(value)
+    if not match:
+        raise ValueError(f"'{value}' is not a transfer rate like 500K or 2M")
+    number, unit = match.groups()
+    return float(number) * RATE_UNITS[unit.lower()]
+
+
+class TokenBucket:
+    """Bytes-per-second bucket. Readers may overdraw it and sleep off the debt."""
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: int):
+        """Take `amount` tokens now and return how long the caller must wait."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= amount
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class BandwidthLimiter:
+    """Global and per-host byte rate limits shared by every video transfer."""
+
+    QUANTUM = 64 * 1024
+
+    def __init__(self, max_rate: float | None, max_host_rate: float | None):
+        self.global_bucket = TokenBucket(max_rate) if max_rate else None
+        self.max_host_rate = max_host_rate
+        self.host_buckets = {}
+
+    @property
+    def enabled(self):
+        return bool(self.global_bucket or self.max_host_rate)
+
+    def describe(self):
+        """Short suffix for the overall progress line, empty when unlimited."""
+        limits = []
+        if self.global_bucket:
+            limits.append(f"{self.global_bucket.rate / 1024**2:.1f} MiB/s total")
+        if self.max_host_rate:
+            limits.append(f"{self.max_host_rate / 1024**2:.1f} MiB/s per host")
+        return f" [grey62](limit {', '.join(limits)})[/]" if limits else ""
+
+    def _host_bucket(self, url: str):
+        host = urlsplit(url).hostname
+        if host not in self.host_buckets:
+            self.host_buckets[host] = TokenBucket(self.max_host_rate)
+        return self.host_buckets[host]
+
+    async def throttle(self, url: str, amount: int):
+        """Account for `amount` bytes read from `url`, sleeping if over the limit."""
+        delay = 0.0
+        if self.global_bucket:
+            delay = self.global_bucket.reserve(amount)
+        if self.max_host_rate:
+            delay = max(delay, self._host_bucket(url).reserve(amount))
+        if delay > 0:
+            await asyncio.sleep(delay)
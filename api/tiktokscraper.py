@@ -1,35 +1,79 @@
+import base64
+import json
 import logging
 import os
 import time
+import urllib.request
+from contextlib import contextmanager
+from queue import Queue
 
 import undetected_chromedriver as uc
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 
-from exception import AccountNotFoundError, InvalidUrlError
-from terminal.console import console
+from exception import AccountNotFoundError
+from terminal.console import QuietStatus, console
 from terminal.logo import ProgramLogo
 
 from .captchasolver import CaptchaSolver
+from .links import sanitize_channel_url, save_video_links
+
+EXTRACT_ITEMS_JS = """
+const containers = document.querySelectorAll(arguments[0]);
+const seen = new Set();
+const items = [];
+for (let i = arguments[1]; i < containers.length; i++) {
+    const link = containers[i].querySelector('[data-e2e="user-post-item"] a');
+    if (!link || seen.has(link.href)) continue;
+    seen.add(link.href);
+    const views = containers[i].querySelector('[data-e2e="video-views"]');
+    items.push({
+        href: link.href,
+        id: link.href.split("?")[0].split("/").pop(),
+        views: views ? views.textContent.trim() : null,
+    });
+}
+return JSON.stringify({count: containers.length, items: items});
+"""
 
 
 class TiktokScraper(CaptchaSolver, ProgramLogo):
+    CONTAINER_SELECTOR = '[class*="-DivItemContainerV2"]'
+    CAPTCHA_PIECE_SELECTOR = "img.captcha_verify_img_slide"
+
     def __init__(
-        self, channel_url: str, headless: bool, enable_log: bool, max_windows: bool
+        self,
+        channel_url: str,
+        headless: bool,
+        enable_log: bool,
+        max_windows: bool,
+        adaptive_scroll: bool = False,
+        stall_timeout: float = 10.0,
+        driver: uc.Chrome | None = None,
+        quiet: bool = False,
     ):
         self.enable_log = enable_log
         self.headless = headless
         self.max_windows = max_windows
-        self.channel_url = self._sanitize_url(channel_url)
-        self.driver = self._setup_driver()
+        self.channel_url = sanitize_channel_url(channel_url)
+        self.owns_driver = driver is None
+        self.driver = driver or self._setup_driver()
+        self.quiet = quiet
         self.scroll_distance = 5000
         self.scroll_delay = 5
+        self.adaptive_scroll = adaptive_scroll
+        self.stall_timeout = stall_timeout
+        self.poll_interval = 0.25
 
         if self.enable_log:
             self._setup_logging()
 
     def _setup_driver(self):
+        return self.create_driver(self.headless, self.max_windows)
+
+    @staticmethod
+    def create_driver(headless: bool, max_windows: bool):
         chrome_options = Options()
         chrome_options.add_argument("--disable-blink-features=AutomationControlled")
         chrome_options.add_argument("--disable-gpu")
@@ -37,10 +81,10 @@ class TiktokScraper(CaptchaSolver, ProgramLogo):
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--disable-popup-blocking")
         chrome_options.add_argument("--no-sandbox")
-        if self.headless:
+        if headless:
             chrome_options.add_argument("--headless")
         driver = uc.Chrome(options=chrome_options)
-        if self.max_windows:
+        if max_windows:
             driver.maximize_window()
         driver.set_window_size(930, 800)
         driver.implicitly_wait(3)
@@ -60,13 +104,20 @@ class TiktokScraper(CaptchaSolver, ProgramLogo):
             filemode="w",
         )
 
+    def _status(self, message: str):
+        if self.quiet:
+            return QuietStatus()
+        return console.status(message, spinner="point", spinner_style="magenta")
+
+    def _close_driver(self):
+        """Quit the browser unless it was borrowed from a DriverPool."""
+        if self.owns_driver:
+            self.driver.quit()
+
     def _get_source(self):
-        self.setup_logo()
-        with console.status(
-            f"[cyan]Opening homepage[/] - {self.channel_url}",
-            spinner="point",
-            spinner_style="magenta",
-        ):
+        if not self.quiet:
+            self.setup_logo()
+        with self._status(f"[cyan]Opening homepage[/] - {self.channel_url}"):
             self.driver.get(self.channel_url)
 
     def _account_not_exists_or_private(self):
@@ -77,7 +128,7 @@ class TiktokScraper(CaptchaSolver, ProgramLogo):
                 "Couldn't find this account"
                 or "This account is private" in element_text
             ):
-                self.driver.quit()
+                self._close_driver()
                 raise AccountNotFoundError(f"{element_text} '{self.channel_url}'")
         except NoSuchElementException:
             pass
@@ -96,11 +147,7 @@ class TiktokScraper(CaptchaSolver, ProgramLogo):
             return False
 
     def _scroll_page(self):
-        with console.status(
-            "[cyan]Scrolling page to the bottom..[/]",
-            spinner="point",
-            spinner_style="magenta",
-        ) as status:
+        with self._status("[cyan]Scrolling page to the bottom..[/]") as status:
             while True:
                 prev_height = self.driver.execute_script(
                     "return document.body.scrollHeight"
@@ -120,57 +167,109 @@ class TiktokScraper(CaptchaSolver, ProgramLogo):
                     break
                 self.scroll_distance += 5000
 
-    def _extract_link(self):
-        containers = self.driver.find_elements(
-            By.CSS_SELECTOR, '[class*="-DivItemContainerV2"]'
-        )
-        video_links = list(
-            container.find_element(
-                By.CSS_SELECTOR, '[data-e2e="user-post-item"] a'
-            ).get_attribute("href")
-            for container in containers
+    def _count_containers(self):
+        return self.driver.execute_script(
+            f"return document.querySelectorAll('{self.CONTAINER_SELECTOR}').length"
         )
-        return video_links
 
-    def _sanitize_url(self, tiktok_channel: str):
-        base_url = "https://www.tiktok.com/@"
+    def _wait_for_new_containers(self, known: int):
+        """Poll until there are more than `known` item containers or we stall."""
+        deadline = time.monotonic() + self.stall_timeout
+        while time.monotonic() < deadline:
+            count = self._count_containers()
+            if count > known:
+                return count
+            time.sleep(self.poll_interval)
+        return known
 
-        if tiktok_channel.startswith(base_url):
-            return tiktok_channel
-        elif tiktok_channel.startswith("@"):
-            return base_url + tiktok_channel[1:]
-        elif tiktok_channel.isalnum():
-            return base_url + tiktok_channel
-        else:
-            raise InvalidUrlError(f"'{tiktok_channel}' is not a valid input!")
+    def _scroll_page_adaptive(self):
+        """Scroll as soon as new items render and collect links along the way."""
+        video_links = []
+        with self._status("[cyan]Scrolling page to the bottom..[/]") as status:
+            harvested = 0
+            while True:
+                items, harvested = self._extract_items(start=harvested)
+                video_links += [item["href"] for item in items]
+                self.driver.execute_script(
+                    "window.scrollTo(0, document.body.scrollHeight);"
+                )
+                if self._wait_for_new_containers(harvested) == harvested:
+                    status.stop()
+                    console.print(
+                        ":checkered_flag: [pale_green1]Please wait! Saving video links to the text file..[/]"
+                    )
+                    break
+                status.update(
+                    f"[cyan]Scrolling page to the bottom..[/] {len(video_links)} links"
+                )
+        return list(dict.fromkeys(video_links))
 
-    def _process_links(self, video_links: list):
-        data = "\n".join(video_links)
+    def _extract_items(self, start: int = 0):
+        """Collect href, id and view count of every container from `start` on.
 
-        url_directory = "Tiktok URL"
-        username = f"{self.get_username}.txt"
-        os.makedirs(url_directory, exist_ok=True)
-        filename = os.path.join(url_directory, username)
+        Everything is gathered by one script call instead of one WebDriver
+        round-trip per container. Also returns the total container count.
+        """
+        result = json.loads(
+            self.driver.execute_script(EXTRACT_ITEMS_JS, self.CONTAINER_SELECTOR, start)
+        )
+        return result["items"], result["count"]
 
-        with open(filename, "w", encoding="utf-8") as file:
-            file.write(data)
+    def _extract_link(self):
+        items, _ = self._extract_items()
+        return [item["href"] for item in items]
 
-        console.print(
-            f'\n{len(video_links)} links has been saved in "[blue1]{filename}[/]"\n'
-        )
+    def _process_links(self, video_links: list):
+        save_video_links(self.get_username, video_links)
         time.sleep(1)
-        self.driver.quit()
+        self._close_driver()
 
     def _save_links(self):
-        self._scroll_page()
-        video_links = self._extract_link()
+        if self.adaptive_scroll:
+            video_links = self._scroll_page_adaptive()
+        else:
+            self._scroll_page()
+            video_links = self._extract_link()
         self._process_links(video_links)
 
-    def _captcha_img_src(self, captcha_verify: str):
+    def _image_bytes(self, src: str | None):
+        """The image behind an <img> src, from its data URI or fetched like the browser."""
+        if not src:
+            return None
+        try:
+            if src.startswith("data:"):
+                return base64.b64decode(src.split(",", 1)[1])
+            user_agent = self.driver.execute_script("return navigator.userAgent")
+            request = urllib.request.Request(
+                src,
+                headers={"User-Agent": user_agent, "Referer": self.driver.current_url},
+            )
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return response.read()
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def _captcha_images(self, captcha_verify: str):
+        """Collect what solve_puzzle needs: the puzzle images and where they sit.
+
+        The piece is read from its src, not screenshotted: a screenshot would
+        fill its transparent corners with whatever the page shows behind them.
+        The background falls back to a screenshot when its src can't be read.
+        """
         captcha_img = self.driver.find_element(By.ID, captcha_verify)
-        if captcha_img.get_attribute("src"):
-            time.sleep(1)
-            captcha_img.screenshot("puzzle.png")
+        src = captcha_img.get_attribute("src")
+        if not src:
+            return None
+        time.sleep(1)
+        images = {
+            "png": self._image_bytes(src) or captcha_img.screenshot_as_png,
+            "display_width": captcha_img.size["width"],
+        }
+        pieces = self.driver.find_elements(By.CSS_SELECTOR, self.CAPTCHA_PIECE_SELECTOR)
+        if pieces:
+            images["piece_png"] = self._image_bytes(pieces[0].get_attribute("src"))
+            images["piece_left"] = pieces[0].location["x"] - captcha_img.location["x"]
+        return images
 
     @property
     def get_username(self):
@@ -182,8 +281,8 @@ class TiktokScraper(CaptchaSolver, ProgramLogo):
         captcha_verify = "captcha-verify-image"
         if self._is_captcha(captcha_verify):
             while True:
-                self._captcha_img_src(captcha_verify)
-                if self.solve_puzzle(self.driver):
+                images = self._captcha_images(captcha_verify)
+                if images and self.solve_puzzle(self.driver, **images):
                     self._save_links()
                     break
 
@@ -192,3 +291,27 @@ class TiktokScraper(CaptchaSolver, ProgramLogo):
         else:
             time.sleep(1)
             self._save_links()
+
+
+class DriverPool:
+    """A few warm Chrome instances shared by the scrapers of a batch run."""
+
+    def __init__(self, size: int, headless: bool, max_windows: bool):
+        self.drivers = [
+            TiktokScraper.create_driver(headless, max_windows) for _ in range(size)
+        ]
+        self._idle = Queue()
+        for driver in self.drivers:
+            self._idle.put(driver)
+
+    @contextmanager
+    def acquire(self):
+        driver = self._idle.get()
+        try:
+            yield driver
+        finally:
+            self._idle.put(driver)
+
+    def close(self):
+        for driver in self.drivers:
+            driver.quit()
@@ -0,0 +1,64 @@
+VARIANT_POLICIES = ("default", "smallest", "best", "h265")
+
+
+def is_h265(variant: dict):
+    codec = variant["codec"].lower()
+    return "265" in codec or "hev" in codec or "hvc" in codec
+
+
+class VariantSelector:
+    """Pick which rendition of a video to download.
+
+    Policies:
+        default   the page's play address, as before
+        smallest  fewest bytes (DataSize, else bitrate)
+        best      highest resolution, then bitrate
+        h265      best H.265 rendition, falling back to best
+
+    `max_height` and `max_bitrate` drop renditions above the cap first; with
+    a cap, "default" behaves like "best" since the play address has no size
+    info. If nothing fits, the smallest rendition is used.
+    """
+
+    def __init__(
+        self,
+        policy: str = "default",
+        max_height: int | None = None,
+        max_bitrate: int | None = None,
+    ):
+        self.policy = policy
+        self.max_height = max_height
+        self.max_bitrate = max_bitrate
+
+    @staticmethod
+    def _size(variant: dict):
+        return variant["size"] or variant["bitrate"]
+
+    @staticmethod
+    def _quality(variant: dict):
+        return variant["height"], variant["bitrate"]
+
+    def _fits(self, variant: dict):
+        return (not self.max_height or variant["height"] <= self.max_height) and (
+            not self.max_bitrate or variant["bitrate"] <= self.max_bitrate
+        )
+
+    def choose(self, details: dict):
+        """Return the chosen variant; its "url" is what gets downloaded."""
+        variants = details.get("variants") or []
+        capped = self.max_height or self.max_bitrate
+        if not variants or (self.policy == "default" and not capped):
+            return {
+                "gear": "default",
+                "bitrate": details.get("bitrate"),
+                "url": details.get("unwatermarked", ""),
+            }
+
+        eligible = [variant for variant in variants if self._fits(variant)]
+        if not eligible:
+            return min(variants, key=self._size)
+        if self.policy == "smallest":
+            return min(eligible, key=self._size)
+        if self.policy == "h265":
+            eligible = [variant for variant in eligible if is_h265(variant)] or eligible
+        return max(eligible, key=self._quality)
@@ -0,0 +1,86 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from terminal.console import console
+
+from .manifest import DownloadManifest
+
+
+def _measure(path: str):
+    """Return (size, sha256) of one file, or (None, None) if it is gone."""
+    try:
+        size = os.path.getsize(path)
+        hasher = hashlib.sha256()
+        with open(path, "rb") as file:
+            while block := file.read(1 << 20):
+                hasher.update(block)
+    except OSError:
+        return None, None
+    return size, hasher.hexdigest()
+
+
+def _judge(size: int, sha256: str, actual_size: int | None, digest: str):
+    if actual_size is None:
+        return "missing"
+    if actual_size != size:
+        return "truncated" if actual_size < size else "size mismatch"
+    return "ok" if digest == sha256 else "hash mismatch"
+
+
+def _inode(path: str):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return path
+    return stat.st_dev, stat.st_ino
+
+
+def verify_downloads(
+    workers: int = 0,
+    manifest_path: str = os.path.join("Tiktok VIDEOS", "manifest.sqlite"),
+):
+    """Re-check every finished video against the manifest, one file per core.
+
+    Hardlinked duplicates are read once. Videos that fail the check are marked
+    failed, so the next run downloads them again. Videos adopted from before the
+    manifest existed have nothing to check against offline: they are counted,
+    and the next run checks them against the server's length. `manifest_path`
+    is the one the downloads were recorded in.
+    """
+    manifest = DownloadManifest(manifest_path)
+    try:
+        videos = manifest.done_videos()
+        by_inode = {}
+        for video in videos:
+            by_inode.setdefault(_inode(video[2]), []).append(video)
+        groups = {group[0][2]: group for group in by_inode.values()}
+
+        counts = {}
+        with ProcessPoolExecutor(max_workers=workers or None) as executor:
+            futures = {
+                executor.submit(_measure, path): group for path, group in groups.items()
+            }
+            with console.status(
+                f"[blue_violet]Verifying [blue1]{len(videos)}[/] videos..."
+            ):
+                for future, group in futures.items():
+                    actual_size, digest = future.result()
+                    for video_id, url, path, size, sha256 in group:
+                        status = _judge(size, sha256, actual_size, digest)
+                        counts[status] = counts.get(status, 0) + 1
+                        if status != "ok":
+                            manifest.mark_failed(video_id, url, f"verify: {status}")
+                            console.print(f"  [red1]{status}[/] {path}")
+        adopted = manifest.count_adopted()
+        if adopted:
+            counts["adopted, checked on the next run"] = adopted
+    finally:
+        manifest.close()
+
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    console.print(
+        f"Checked '[green1]{len(videos)}[/]' videos in '[green1]{len(groups)}[/]' "
+        f"files: {summary or 'nothing to verify'}"
+    )
+    return counts
@@ -0,0 +1,150 @@
+"""Accuracy and speed of the captcha offset estimator against the old corner heuristic.
+
+Samples are PNG files named <name>_<offset>.png, with an optional piece image
+<name>_<offset>.piece.png next to them.
+
+Usage: python -m benchmarks.bench_captcha [SAMPLE_DIR] [--synthetic N] [-t PX]
+"""
+
+import argparse
+import glob
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+
+import cv2 as cv
+import numpy as np
+
+from api.captchasolver import CaptchaSolver
+from terminal.console import console
+
+SAMPLE_NAME = re.compile(r"_(\d+)\.png$")
+
+
+def legacy_offset(png: bytes):
+    """The previous estimator: a disk round-trip plus a Python loop over corners.
+
+    Its fixed -8 px correction was tuned on live captchas, so it lands a few
+    pixels short on the synthetic samples.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "puzzle.png")
+        with open(path, "wb") as file:
+            file.write(png)
+        gray = cv.cvtColor(cv.imread(path), cv.COLOR_BGR2GRAY)
+    corners = cv.goodFeaturesToTrack(gray, 15, 0.05, 1)
+    if corners is None:
+        return None
+    x_array = sorted(i.ravel()[0] for i in np.intp(corners) if i.ravel()[0] > 70)
+    unic = Counter(x_array)
+    return next((x - 8 for x in x_array if unic[x] > 1), None)
+
+
+def write_synthetic_samples(directory: str, count: int, seed: int = 404):
+    """Draw textured backgrounds with a darkened notch and the matching piece.
+
+    The piece is saved with an alpha channel, as its src serves it, and the
+    background also shows it at its starting place on the left, the way a
+    screenshot of the puzzle does.
+    """
+    rng = np.random.default_rng(seed)
+    height, width, size = 212, 340, 60
+    for index in range(count):
+        noise = rng.integers(0, 255, (height // 8, width // 8), dtype=np.uint8)
+        background = cv.resize(noise, (width, height), interpolation=cv.INTER_CUBIC)
+        background = cv.cvtColor(background, cv.COLOR_GRAY2BGR)
+        x = int(rng.integers(80, width - size - 10))
+        y = int(rng.integers(10, height - size - 10))
+
+        mask = np.zeros((height, width), np.uint8)
+        cv.rectangle(mask, (x, y + 12), (x + size - 12, y + size), 255, -1)
+        cv.circle(mask, (x + (size - 12) // 2, y + 12), 12, 255, -1)
+        piece_mask = mask[y : y + size + 1, x : x + size]
+        piece = np.zeros((*piece_mask.shape, 4), np.uint8)
+        piece[..., :3] = background[y : y + size + 1, x : x + size]
+        contours, _ = cv.findContours(
+            piece_mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE
+        )
+        cv.drawContours(piece, contours, -1, (255, 255, 255, 255), 2)
+        piece[..., 3] = np.where(piece_mask > 0, 255, piece[..., 3])
+
+        background[mask > 0] = (background[mask > 0] * 0.35).astype(np.uint8)
+        contours, _ = cv.findContours(mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+        cv.drawContours(background, contours, -1, (235, 235, 235), 1)
+
+        start = int(rng.integers(0, 10))
+        area = background[y : y + size + 1, start : start + size]
+        alpha = piece[..., 3:] / 255.0
+        area[:] = (piece[..., :3] * alpha + area * (1 - alpha)).astype(np.uint8)
+
+        name = os.path.join(directory, f"synthetic{index:03d}_{x}")
+        cv.imwrite(f"{name}.png", background)
+        cv.imwrite(f"{name}.piece.png", piece)
+
+
+def load_samples(directory: str):
+    samples = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.png"))):
+        match = SAMPLE_NAME.search(path)
+        if not match or path.endswith(".piece.png"):
+            continue
+        with open(path, "rb") as file:
+            png = file.read()
+        piece_path = f"{path[:-4]}.piece.png"
+        piece_png = None
+        if os.path.exists(piece_path):
+            with open(piece_path, "rb") as file:
+                piece_png = file.read()
+        samples.append((int(match.group(1)), png, piece_png))
+    return samples
+
+
+def new_offset(png: bytes, piece_png: bytes | None):
+    gray = CaptchaSolver._load_image(png)
+    piece = CaptchaSolver._load_piece(piece_png) if piece_png else None
+    return CaptchaSolver._get_x_offset(gray, piece)
+
+
+def evaluate(name: str, estimator, samples: list, tolerance: int):
+    hits = 0
+    start = time.perf_counter()
+    for expected, png, piece_png in samples:
+        offset = estimator(png, piece_png)
+        hits += offset is not None and abs(offset - expected) <= tolerance
+    elapsed = time.perf_counter() - start
+    console.print(
+        f"{name:<16} accuracy [green1]{hits}/{len(samples)}[/] "
+        f"({hits / len(samples):.0%}), {elapsed / len(samples) * 1000:.2f} ms per puzzle"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sample_dir", nargs="?", default=None)
+    parser.add_argument("--synthetic", default=100, type=int)
+    parser.add_argument("-t", "--tolerance", default=5, type=int)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        sample_dir = args.sample_dir
+        if sample_dir is None:
+            write_synthetic_samples(directory, args.synthetic)
+            sample_dir = directory
+        samples = load_samples(sample_dir)
+
+    if not samples:
+        console.print(f"[red1]No <name>_<offset>.png samples in[/] {sample_dir}")
+        return
+    evaluate(
+        "legacy corners", lambda png, _: legacy_offset(png), samples, args.tolerance
+    )
+    evaluate(
+        "edges only", lambda png, _: new_offset(png, None), samples, args.tolerance
+    )
+    evaluate("edges + template", new_offset, samples, args.tolerance)
+
+
+if __name__ == "__main__":
+    main()
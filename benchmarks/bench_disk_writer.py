@@ -0,0 +1,164 @@
+"""Compare per-chunk aiofiles writes with DiskWriter on a local payload server.
+
+Downloads VIDEOS payloads from benchmarks.fakeserver, CONCURRENCY at a time,
+into a temporary directory once per write strategy, and reports throughput,
+thread hand-offs and how late the event loop got to run.
+
+Usage: python -m benchmarks.bench_disk_writer [-n VIDEOS] [-c CONCURRENCY]
+           [--video_size BYTES] [--bandwidth RATE] [--buffer BYTES] [--json FILE]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiofiles
+import aiohttp
+
+from api.diskwriter import DiskWriter
+from benchmarks.bench_download import (
+    FIRST_ID,
+    ROOT,
+    free_port,
+    percentile,
+    wait_for_server,
+)
+from terminal.console import console
+
+LAG_INTERVAL = 0.01
+
+
+class CountingWriter(DiskWriter):
+    submitted = 0
+
+    async def submit(self, function, *args):
+        self.submitted += 1
+        return await super().submit(function, *args)
+
+
+async def aiofiles_download(session, url: str, path: str, _):
+    hops = 2
+    async with session.get(url) as response:
+        async with aiofiles.open(path, "wb") as file:
+            async for chunk in response.content.iter_any():
+                await file.write(chunk)
+                hops += 1
+    return hops
+
+
+async def writer_download(session, url: str, path: str, writer: DiskWriter):
+    async with session.get(url) as response:
+        total = int(response.headers.get("Content-Length", 0)) or None
+        file = await writer.open(path, 0, total)
+        try:
+            async for chunk in response.content.iter_any():
+                await file.write(chunk)
+        finally:
+            await file.close()
+    return 0
+
+
+async def measure_lag(lags: list):
+    """Record how much later than asked the loop wakes us, a proxy for contention."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append(time.perf_counter() - start - LAG_INTERVAL)
+
+
+async def run_strategy(base_url: str, directory: str, download, writer, args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    lags = []
+
+    async def fetch(session, index: int):
+        video_id = FIRST_ID + index
+        async with semaphore:
+            return await download(
+                session,
+                f"{base_url}/play/{video_id}",
+                os.path.join(directory, f"{video_id}.mp4"),
+                writer,
+            )
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        lag_task = asyncio.create_task(measure_lag(lags))
+        start = time.perf_counter()
+        hops = await asyncio.gather(*(fetch(session, i) for i in range(args.videos)))
+        elapsed = time.perf_counter() - start
+        lag_task.cancel()
+    if writer is not None:
+        writer.close()
+
+    size = sum(entry.stat().st_size for entry in os.scandir(directory))
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "mib_per_second": round(size / elapsed / 1024**2, 1),
+        "thread_hops": writer.submitted if writer is not None else sum(hops),
+        "loop_lag_p99_ms": round(percentile(lags, 0.99) * 1000, 2),
+        "loop_lag_max_ms": round(max(lags, default=0) * 1000, 2),
+    }
+
+
+def strategies(args: argparse.Namespace):
+    yield "aiofiles per chunk", aiofiles_download, lambda: None
+    yield "writer", writer_download, lambda: CountingWriter(args.buffer)
+    yield "writer preallocate", writer_download, lambda: CountingWriter(
+        args.buffer, preallocate=True
+    )
+    yield "writer fsync=close", writer_download, lambda: CountingWriter(
+        args.buffer, fsync="close"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--videos", default=200, type=int)
+    parser.add_argument("-c", "--concurrency", default=64, type=int)
+    parser.add_argument("--video_size", default=4 * 1024**2, type=int)
+    parser.add_argument("--bandwidth", default="0", help="Per connection, e.g. 2M")
+    parser.add_argument("--buffer", default=1 << 20, type=int)
+    parser.add_argument("--json", default=None, help="Also write the results here")
+    args = parser.parse_args()
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fakeserver", "--port", str(port)]
+        + ["--video_size", str(args.video_size), "--bandwidth", args.bandwidth],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    results = {}
+    try:
+        asyncio.run(wait_for_server(base_url))
+        for name, download, make_writer in strategies(args):
+            with tempfile.TemporaryDirectory() as directory:
+                results[name] = asyncio.run(
+                    run_strategy(base_url, directory, download, make_writer(), args)
+                )
+    finally:
+        server.terminate()
+        server.wait()
+
+    for name, result in results.items():
+        console.print(
+            f"[blue1]{name:<20}[/] [green1]{result['mib_per_second']:>7} MiB/s[/] "
+            f"in {result['elapsed_seconds']} s, {result['thread_hops']} thread hops, "
+            f"loop lag p99 {result['loop_lag_p99_ms']} ms "
+            f"(max {result['loop_lag_max_ms']} ms)",
+            highlight=False,
+        )
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Drive the real download pipeline against the local fake TikTok/CDN server.
+
+Starts benchmarks.fakeserver in a subprocess, downloads VIDEOS synthetic videos
+into a temporary directory through stream_videos, and reports throughput,
+latency percentiles and peak memory.
+
+Usage: python -m benchmarks.bench_download [-n VIDEOS] [--video_size BYTES]
+           [--latency S] [--bandwidth RATE] [--error_rate P] [--truncate_rate P]
+           [--url_ttl S] [--passes N] [--sink disk|memory] [-md N] [-mv N] [-mh N] [-vp POLICY] [-sg N] [-sm BYTES]
+           [--json FILE]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import aiohttp
+
+from api.asyncdownloader import stream_videos
+from api.events import VideoDownloaded, VideoResolved
+from api.metrics import metrics
+from api.sinks import MemorySink
+from api.variants import VARIANT_POLICIES
+from terminal.console import console
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIRST_ID = 7300000000000000000
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, args: argparse.Namespace):
+    command = [sys.executable, "-m", "benchmarks.fakeserver", "--port", str(port)]
+    for option in ("latency", "bandwidth", "error_rate", "truncate_rate", "url_ttl"):
+        command += [f"--{option}", str(getattr(args, option))]
+    command += ["--video_size", str(args.video_size)]
+    return subprocess.Popen(
+        command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+async def wait_for_server(base_url: str, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(f"{base_url}/@bench"):
+                    return
+            except aiohttp.ClientConnectionError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.1)
+
+
+def peak_rss_mib():
+    """Peak resident set size of this process, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(values: list, q: float):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_benchmark(base_url: str, args: argparse.Namespace):
+    urls = [
+        f"{base_url}/@bench/video/{FIRST_ID + index}" for index in range(args.videos)
+    ]
+    sink = MemorySink() if args.sink == "memory" else None
+    events = Counter()
+    resolved_at = {}
+    latencies = []
+    downloaded = 0
+
+    start = time.perf_counter()
+    for _ in range(args.passes):
+        async for event in stream_videos(
+            urls,
+            sink=sink,
+            max_details=args.max_details,
+            max_videos=args.max_videos,
+            max_per_host=args.max_per_host,
+            backoff=args.backoff,
+            variant_policy=args.variant_policy,
+            segments=args.segments,
+            segment_min=args.segment_min,
+        ):
+            events[type(event).__name__] += 1
+            now = time.perf_counter()
+            if isinstance(event, VideoResolved):
+                resolved_at[event.video_id] = now
+            elif isinstance(event, VideoDownloaded):
+                latencies.append(now - resolved_at.pop(event.video_id, start))
+                downloaded += event.size
+    elapsed = time.perf_counter() - start
+
+    summary = metrics.summary()
+    stages = summary["stages"]
+    return {
+        "videos": args.videos,
+        "downloaded": events["VideoDownloaded"],
+        "failed": events["VideoFailed"],
+        "retries": metrics.counter("retries"),
+        "detail_cache": {
+            result: summary["counters"].get(f"detail_cache[result={result}]", 0)
+            for result in ("hit", "miss", "revalidated")
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "videos_per_second": round(events["VideoDownloaded"] / elapsed, 1),
+        "mib_downloaded": round(downloaded / 1024**2, 1),
+        "mib_per_second": round(downloaded / elapsed / 1024**2, 2),
+        "download_p50_seconds": round(percentile(latencies, 0.5), 4),
+        "download_p99_seconds": round(percentile(latencies, 0.99), 4),
+        "detail_p50_seconds": stages.get("detail_fetch", {}).get("p50_seconds"),
+        "detail_p99_seconds": stages.get("detail_fetch", {}).get("p99_seconds"),
+        "peak_rss_mib": peak_rss_mib(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--videos", default=2000, type=int)
+    parser.add_argument("--video_size", default=256 * 1024, type=int)
+    parser.add_argument("--latency", default=0.0, type=float)
+    parser.add_argument("--bandwidth", default="0", help="Per connection, e.g. 2M")
+    parser.add_argument("--error_rate", default=0.0, type=float)
+    parser.add_argument("--truncate_rate", default=0.0, type=float)
+    parser.add_argument("--url_ttl", default=0.0, type=float)
+    parser.add_argument(
+        "--passes",
+        default=1,
+        type=int,
+        help="Run the same URLs again, in one directory",
+    )
+    parser.add_argument("--sink", default="disk", choices=("disk", "memory"))
+    parser.add_argument("-md", "--max_details", default=16, type=int)
+    parser.add_argument("-mv", "--max_videos", default=8, type=int)
+    parser.add_argument("-mh", "--max_per_host", default=0, type=int)
+    parser.add_argument("--backoff", default=0.05, type=float)
+    parser.add_argument(
+        "-vp", "--variant_policy", default="default", choices=VARIANT_POLICIES
+    )
+    parser.add_argument("-sg", "--segments", default=1, type=int)
+    parser.add_argument("-sm", "--segment_min", default=16 << 20, type=int)
+    parser.add_argument("--json", default=None, help="Also write the results here")
+    args = parser.parse_args()
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(port, args)
+    json_path = os.path.abspath(args.json) if args.json else None
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                asyncio.run(wait_for_server(base_url))
+                results = asyncio.run(run_benchmark(base_url, args))
+            finally:
+                os.chdir(ROOT)
+    finally:
+        server.terminate()
+        server.wait()
+
+    for name, value in results.items():
+        console.print(f"{name:<22} [green1]{value}[/]")
+    if json_path:
+        with open(json_path, "w") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
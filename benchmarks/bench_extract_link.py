@@ -0,0 +1,75 @@
+"""Compare per-element link extraction with the single execute_script call.
+
+Loads a generated profile grid into headless Chrome.
+
+Usage: python -m benchmarks.bench_extract_link [-n ITEMS]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from selenium.webdriver.common.by import By
+
+from api.tiktokscraper import TiktokScraper
+from terminal.console import console
+
+
+def write_fixture(directory: str, items: int):
+    containers = "".join(
+        f'<div class="css-{index:06x}-DivItemContainerV2">'
+        f'<div data-e2e="user-post-item"><a href="https://www.tiktok.com/@bench/video/{7300000000000000000 + index}">'
+        f'<strong data-e2e="video-views">{index}K</strong></a></div></div>'
+        for index in range(items)
+    )
+    path = os.path.join(directory, "profile-grid.html")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(f"<!DOCTYPE html><html><body>{containers}</body></html>")
+    return path
+
+
+def legacy_extract_link(scraper: TiktokScraper):
+    containers = scraper.driver.find_elements(
+        By.CSS_SELECTOR, scraper.CONTAINER_SELECTOR
+    )
+    return [
+        container.find_element(
+            By.CSS_SELECTOR, '[data-e2e="user-post-item"] a'
+        ).get_attribute("href")
+        for container in containers
+    ]
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--items", default=1000, type=int)
+    args = parser.parse_args()
+
+    scraper = TiktokScraper.__new__(TiktokScraper)
+    scraper.headless, scraper.max_windows = True, False
+    scraper.driver = scraper._setup_driver()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            scraper.driver.get(f"file://{write_fixture(directory, args.items)}")
+            legacy, legacy_time = timed(legacy_extract_link, scraper)
+            batched, batched_time = timed(scraper._extract_link)
+    finally:
+        scraper.driver.quit()
+
+    assert legacy == batched, "both extractors must return the same links"
+    console.print(
+        f"[blue1]{args.items}[/] containers: "
+        f"per-element {legacy_time:.2f} s, single script {batched_time:.3f} s, "
+        f"[green1]{legacy_time / batched_time:.0f}x faster[/]"
+    )
+
+
+if __name__ == "__main__":
+    main()
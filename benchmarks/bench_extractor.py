@@ -0,0 +1,49 @@
+"""Compare the targeted rehydration-script scan with a full BeautifulSoup parse.
+
+Usage: python -m benchmarks.bench_extractor [-n ROUNDS] [FIXTURE_DIR]
+"""
+
+import argparse
+import glob
+import json
+import os
+import timeit
+
+from bs4 import BeautifulSoup
+
+from api.extractor import SCRIPT_ID, extract_rehydration_data
+from terminal.console import console
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def soup_extract(html: str):
+    soup = BeautifulSoup(html, "lxml")
+    return json.loads(soup.select_one(f"script#{SCRIPT_ID}").contents[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixture_dir", nargs="?", default=FIXTURE_DIR)
+    parser.add_argument("-n", "--rounds", default=50, type=int)
+    args = parser.parse_args()
+
+    for path in sorted(glob.glob(os.path.join(args.fixture_dir, "*.html"))):
+        with open(path, encoding="utf-8") as file:
+            html = file.read()
+        assert extract_rehydration_data(html) == soup_extract(html)
+
+        soup_time = timeit.timeit(lambda: soup_extract(html), number=args.rounds)
+        scan_time = timeit.timeit(
+            lambda: extract_rehydration_data(html), number=args.rounds
+        )
+        console.print(
+            f"[blue1]{os.path.basename(path)}[/] ({len(html) / 1024:.0f} KiB): "
+            f"bs4 {soup_time / args.rounds * 1000:.2f} ms, "
+            f"scan {scan_time / args.rounds * 1000:.2f} ms, "
+            f"[green1]{soup_time / scan_time:.1f}x faster[/]"
+        )
+
+
+if __name__ == "__main__":
+    main()
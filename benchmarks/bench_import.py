@@ -0,0 +1,81 @@
+"""Measure start-up cost: `-X importtime` totals and which heavy modules each mode loads.
+
+Each mode imports main plus the modules that mode pulls in lazily, in a fresh
+interpreter, so numbers are comparable across commits.
+
+Usage: python -m benchmarks.bench_import [-n RUNS] [--top N]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from terminal.console import console
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$")
+HEAVY_MODULES = (
+    "cv2",
+    "numpy",
+    "selenium",
+    "undetected_chromedriver",
+    "inquirer",
+    "bs4",
+    "rich.traceback",
+    "aiohttp.web",
+)
+MODES = {
+    "download only": "import main",
+    "http only": "import main, api.itemlist",
+    "selenium": "import main, api.tiktokscraper",
+    "verify": "import main, api.verify",
+}
+
+
+def import_times(code: str):
+    """Return ({module: cumulative us}, top-level total us, heavy modules loaded)."""
+    probe = f"{code}; import sys; print(*(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        _, spent, indent, module = match.groups()
+        cumulative[module] = int(spent)
+        if len(indent) == 1:
+            total += int(spent)
+    return cumulative, total, result.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--runs", default=5, type=int)
+    parser.add_argument("--top", default=8, type=int)
+    args = parser.parse_args()
+
+    for mode, code in MODES.items():
+        runs = [import_times(code) for _ in range(args.runs)]
+        totals = [total for _, total, _ in runs]
+        cumulative, _, heavy = runs[-1]
+        console.print(
+            f"[blue1]{mode:<14}[/] median [green1]{statistics.median(totals) / 1000:.0f} ms[/] "
+            f"(min {min(totals) / 1000:.0f} ms), heavy: {', '.join(heavy) or 'none'}"
+        )
+        slowest = sorted(cumulative.items(), key=lambda item: item[1], reverse=True)
+        for module, spent in slowest[: args.top]:
+            console.print(f"    {spent / 1000:>7.1f} ms  {module}", highlight=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""Local stand-in for the TikTok web and CDN endpoints.
+
+Profiles and item lists come from recorded fixtures; video detail pages and
+ranged MP4 payloads are synthesized for any id, with optional latency,
+per-connection bandwidth, 503 errors, cut-off transfers and play URLs that
+expire (answered with 403 afterwards).
+
+Usage: python -m benchmarks.fakeserver [--port PORT] [--fixtures DIR]
+           [--latency S] [--bandwidth RATE] [--error_rate P]
+           [--truncate_rate P] [--video_size BYTES] [--url_ttl S]
+
+Then run, for example: python main.py -u google -ho -bu http://127.0.0.1:8000
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import time
+
+from aiohttp import web
+
+from api.extractor import SCRIPT_ID
+from api.throttle import parse_rate
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+NEVER_EXPIRES = 9999999999
+CREATE_TIME = 1700000000
+WRITE_SIZE = 64 * 1024
+
+
+def rehydration_page(default_scope: dict):
+    payload = json.dumps({"__DEFAULT_SCOPE__": default_scope})
+    return (
+        "<!DOCTYPE html><html><head><title>TikTok</title></head><body>"
+        f'<script id="{SCRIPT_ID}" type="application/json">{payload}</script>'
+        "</body></html>"
+    )
+
+
+def load_item_lists(fixture_dir: str):
+    """Map secUid -> {request cursor: recorded page} for every recorded profile."""
+    item_lists = {}
+    for user_directory in glob.glob(os.path.join(fixture_dir, "item_list", "*")):
+        username = os.path.basename(user_directory)
+        pages = {}
+        cursor = "0"
+        page_files = glob.glob(os.path.join(user_directory, "page-*.json"))
+        for path in sorted(page_files, key=lambda p: int(p.rsplit("-")[-1][:-5])):
+            with open(path, "r") as file:
+                page = json.load(file)
+            pages[cursor] = page
+            cursor = str(page["cursor"])
+        item_lists[f"fixture-{username}"] = (username, pages)
+    return item_lists
+
+
+async def profile(request: web.Request):
+    username = request.match_info["username"]
+    sec_uid = f"fixture-{username}"
+    if sec_uid not in request.app["item_lists"]:
+        return web.Response(text=rehydration_page({}), content_type="text/html")
+    user = {"uniqueId": username, "secUid": sec_uid, "privateAccount": False}
+    default_scope = {"webapp.user-detail": {"userInfo": {"user": user}}}
+    return web.Response(text=rehydration_page(default_scope), content_type="text/html")
+
+
+async def item_list(request: web.Request):
+    _, pages = request.app["item_lists"].get(request.query.get("secUid"), (None, {}))
+    page = pages.get(request.query.get("cursor", "0"))
+    if page is None:
+        return web.json_response({"hasMore": False, "itemList": [], "cursor": "0"})
+    return web.json_response(page)
+
+
+async def inject_faults(request: web.Request):
+    """Apply the configured latency and maybe answer with a retryable 503."""
+    options = request.app["options"]
+    if options["latency"]:
+        await asyncio.sleep(options["latency"])
+    if random.random() < options["error_rate"]:
+        return web.Response(status=503, headers={"Retry-After": "0"})
+    return None
+
+
+def video_payload(app: web.Application, video_id: str, size: int):
+    """Distinct bytes per id (so dedup does not kick in) from one shared block."""
+    prefix = video_id.encode()[:32].ljust(32, b"\0")
+    return prefix + app["block"][32:size]
+
+
+async def video_detail(request: web.Request):
+    if (error := await inject_faults(request)) is not None:
+        return error
+    username = request.match_info["username"]
+    video_id = request.match_info["video_id"]
+    size = request.app["options"]["video_size"]
+    play_url = f"{request.scheme}://{request.host}/play/{video_id}"
+    url_ttl = request.app["options"]["url_ttl"]
+    expire = int(time.time() + url_ttl) if url_ttl else NEVER_EXPIRES
+    item = {
+        "id": video_id,
+        "desc": f"Synthetic video {video_id}",
+        "createTime": str(CREATE_TIME),
+        "video": {
+            "playAddr": f"{play_url}?expire={expire}",
+            "downloadAddr": f"{play_url}?watermark=1&expire={expire}",
+            "bitrate": 1_000_000,
+            "bitrateInfo": [
+                {
+                    "GearName": f"normal_{height}_0",
+                    "Bitrate": bitrate,
+                    "QualityType": quality,
+                    "CodecType": codec,
+                    "PlayAddr": {
+                        "UrlList": [f"{play_url}?q={height}&expire={expire}"],
+                        "DataSize": size * height // 1080,
+                        "Width": height * 9 // 16,
+                        "Height": height,
+                    },
+                }
+                for height, bitrate, quality, codec in (
+                    (1080, 1_000_000, 2, "h265_hvc1"),
+                    (720, 600_000, 10, "h264"),
+                    (540, 350_000, 20, "h264"),
+                )
+            ],
+        },
+        "author": {"uniqueId": username},
+    }
+    default_scope = {"webapp.video-detail": {"itemInfo": {"itemStruct": item}}}
+    response = web.Response(
+        text=rehydration_page(default_scope), content_type="text/html"
+    )
+    response.set_cookie("ttwid", f"fixture-{video_id}")
+    return response
+
+
+async def play(request: web.Request):
+    if (error := await inject_faults(request)) is not None:
+        return error
+    options = request.app["options"]
+    if int(request.query.get("expire", NEVER_EXPIRES)) < time.time():
+        return web.Response(status=403, text="Access Denied")
+    height = int(request.query.get("q", 1080))
+    payload = video_payload(
+        request.app,
+        request.match_info["video_id"],
+        options["video_size"] * height // 1080,
+    )
+    start, end = 0, len(payload) - 1
+    range_header = request.headers.get("Range")
+    if range_header:
+        first, _, last = range_header.partition("=")[2].partition("-")
+        start = int(first or 0)
+        end = min(int(last), end) if last else end
+        if start >= len(payload):
+            return web.Response(
+                status=416, headers={"Content-Range": f"bytes */{len(payload)}"}
+            )
+
+    body = memoryview(payload)[start : end + 1]
+    response = web.StreamResponse(
+        status=206 if range_header else 200,
+        headers={
+            "Content-Type": "video/mp4",
+            "Content-Length": str(len(body)),
+            "Accept-Ranges": "bytes",
+        },
+    )
+    if range_header:
+        response.headers["Content-Range"] = f"bytes {start}-{end}/{len(payload)}"
+    await response.prepare(request)
+
+    cut_at = len(body) // 2 if random.random() < options["truncate_rate"] else None
+    for offset in range(0, len(body), WRITE_SIZE):
+        if cut_at is not None and offset >= cut_at:
+            request.transport.close()
+            return response
+        chunk = body[offset : offset + WRITE_SIZE]
+        await response.write(chunk)
+        if options["bandwidth"]:
+            await asyncio.sleep(len(chunk) / options["bandwidth"])
+    await response.write_eof()
+    return response
+
+
+def create_app(
+    fixture_dir: str = FIXTURE_DIR,
+    latency: float = 0.0,
+    bandwidth: float = 0.0,
+    error_rate: float = 0.0,
+    truncate_rate: float = 0.0,
+    video_size: int = 256 * 1024,
+    url_ttl: float = 0.0,
+):
+    app = web.Application()
+    app["item_lists"] = load_item_lists(fixture_dir)
+    app["options"] = {
+        "latency": latency,
+        "bandwidth": bandwidth,
+        "error_rate": error_rate,
+        "truncate_rate": truncate_rate,
+        "video_size": video_size,
+        "url_ttl": url_ttl,
+    }
+    app["block"] = random.Random(404).randbytes(video_size)
+    app.router.add_get("/api/post/item_list/", item_list)
+    app.router.add_get("/@{username}/video/{video_id}", video_detail)
+    app.router.add_get("/@{username}", profile)
+    app.router.add_get("/play/{video_id}", play)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", default=8000, type=int)
+    parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    parser.add_argument("--latency", default=0.0, type=float)
+    parser.add_argument("--bandwidth", default=0.0, type=parse_rate)
+    parser.add_argument("--error_rate", default=0.0, type=float)
+    parser.add_argument("--truncate_rate", default=0.0, type=float)
+    parser.add_argument("--video_size", default=256 * 1024, type=int)
+    parser.add_argument(
+        "--url_ttl", default=0.0, type=float, help="Play URLs expire after S seconds"
+    )
+    args = parser.parse_args()
+    app = create_app(
+        args.fixtures,
+        latency=args.latency,
+        bandwidth=args.bandwidth,
+        error_rate=args.error_rate,
+        truncate_rate=args.truncate_rate,
+        video_size=args.video_size,
+        url_ttl=args.url_ttl,
+    )
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -24,3 +24,19 @@ class ScriptTagNotFoundError(TiktokException):
 
 class TextfileNotFoundError(TiktokException):
     """Raised when a Tiktok URL is not found."""
+
+
+class DownloadError(TiktokException):
+    """Raised when a video response cannot be saved."""
+
+
+class IncompleteDownloadError(DownloadError):
+    """Raised when a video stream ends before all of its bytes arrived."""
+
+
+class PlayUrlExpiredError(DownloadError):
+    """Raised when the CDN refuses a signed play URL that is no longer valid."""
+
+
+class ItemListUnavailableError(TiktokException):
+    """Raised when the item list API does not return the profile's videos."""
@@ -1,16 +1,49 @@
 import argparse
 import asyncio
 import os
+import sys
 import time
+from typing import TYPE_CHECKING
 
-from rich.traceback import install as traceback_install
-
-from api.asyncdownloader import AsyncDownloader
-from api.tiktokscraper import TiktokScraper
+from api.asyncdownloader import AsyncBatchDownloader, AsyncDownloader
+from api.diskwriter import FSYNC_POLICIES
+from api.links import sanitize_channel_url
+from api.metadata import METADATA_FORMATS
+from api.metrics import metrics, serve_metrics
+from api.throttle import parse_rate
+from api.variants import VARIANT_POLICIES
+from exception import TiktokException
 from terminal.console import console
 from terminal.logo import ProgramLogo
+from terminal.progress import PROGRESS_MODES
+
+if TYPE_CHECKING:
+    from api.tiktokscraper import DriverPool
+
+
+def rich_excepthook(*exc_info):
+    """Install rich tracebacks only once something fails; importing them is slow."""
+    from rich.traceback import install as traceback_install
+
+    traceback_install(theme="vim")
+    sys.excepthook(*exc_info)
+
+
+sys.excepthook = rich_excepthook
+
+
+def positive_int(value: str):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"'{value}' must be at least 1")
+    return number
+
 
-traceback_install(theme="vim")
+def byte_size(value: str):
+    try:
+        return max(1, int(parse_rate(value)))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a size like 256K or 4M")
 
 
 def parse_arguments():
@@ -22,6 +55,20 @@ def parse_arguments():
         type=str,
         help="TikTok username, Example (google, @google, https://www.tiktok.com/@google)",
     )
+    parser.add_argument(
+        "-bf",
+        "--batch_file",
+        default=None,
+        type=str,
+        help="Text file with one username per line, scraped and downloaded together",
+    )
+    parser.add_argument(
+        "-br",
+        "--browsers",
+        default=2,
+        type=positive_int,
+        help="Number of accounts scraped in parallel in --batch_file mode",
+    )
     parser.add_argument(
         "-do",
         "--download_only",
@@ -34,7 +81,14 @@ def parse_arguments():
         "--save_json",
         default=False,
         action="store_true",
-        help="Save video info as JSON file",
+        help="Stream video info to 'Tiktok JSON/<username>.ndjson' as each video is resolved",
+    )
+    parser.add_argument(
+        "-jf",
+        "--json_format",
+        default="ndjson",
+        choices=METADATA_FORMATS,
+        help="Metadata file format for --save_json: plain NDJSON or gzip-compressed NDJSON",
     )
     parser.add_argument(
         "-mx",
@@ -71,9 +125,368 @@ def parse_arguments():
         action="store_true",
         help="Close the progress bar immediately after one task is completed",
     )
+    parser.add_argument(
+        "-pg",
+        "--progress_mode",
+        default="auto",
+        choices=PROGRESS_MODES,
+        help="Progress display: one bar per video (full), the busiest transfers plus totals (compact) or log lines (plain). Default picks plain without a terminal and compact for large runs",
+    )
+    parser.add_argument(
+        "-tt",
+        "--top_transfers",
+        default=10,
+        type=positive_int,
+        help="Number of active transfers shown in compact mode",
+    )
+    parser.add_argument(
+        "-as",
+        "--adaptive_scroll",
+        default=False,
+        action="store_true",
+        help="Scroll as soon as new videos load instead of waiting a fixed delay",
+    )
+    parser.add_argument(
+        "-st",
+        "--stall_timeout",
+        default=10.0,
+        type=float,
+        help="Seconds without new videos before --adaptive_scroll stops",
+    )
+    parser.add_argument(
+        "-ho",
+        "--http_only",
+        default=False,
+        action="store_true",
+        help="Collect video links through the item list API instead of a browser",
+    )
+    parser.add_argument(
+        "-bu",
+        "--base_url",
+        default="https://www.tiktok.com",
+        type=str,
+        help="TikTok web origin used by --http_only (e.g. a local stand-in server)",
+    )
+    parser.add_argument(
+        "-md",
+        "--max_details",
+        default=16,
+        type=positive_int,
+        help="Maximum number of video detail pages fetched at the same time",
+    )
+    parser.add_argument(
+        "-mv",
+        "--max_videos",
+        default=8,
+        type=positive_int,
+        help="Maximum number of videos downloaded at the same time",
+    )
+    parser.add_argument(
+        "-mh",
+        "--max_per_host",
+        default=0,
+        type=int,
+        help="Maximum number of concurrent requests to a single host (0 = no limit)",
+    )
+    parser.add_argument(
+        "-fd",
+        "--force_download",
+        default=False,
+        action="store_true",
+        help="Download every URL again, even those already recorded as downloaded",
+    )
+    parser.add_argument(
+        "-vf",
+        "--verify",
+        default=False,
+        action="store_true",
+        help="Re-check the size and SHA-256 of every downloaded video, then exit. Bad files are downloaded again on the next run",
+    )
+    parser.add_argument(
+        "-vw",
+        "--verify_workers",
+        default=0,
+        type=int,
+        help="Processes used by --verify (0 = one per CPU core)",
+    )
+    parser.add_argument(
+        "-pw",
+        "--parse_workers",
+        default=0,
+        type=int,
+        help="Parse detail pages in a pool of this many workers (0 = on the event loop)",
+    )
+    parser.add_argument(
+        "-pm",
+        "--parse_mode",
+        default="thread",
+        choices=["thread", "process"],
+        help="Kind of pool used by --parse_workers",
+    )
+    parser.add_argument(
+        "-rt",
+        "--retries",
+        default=3,
+        type=int,
+        help="How many times a failed detail page or video request is retried",
+    )
+    parser.add_argument(
+        "-bo",
+        "--backoff",
+        default=1.0,
+        type=float,
+        help="Base delay in seconds for exponential backoff between retries",
+    )
+    parser.add_argument(
+        "-ps",
+        "--pool_size",
+        default=100,
+        type=int,
+        help="Maximum number of open connections in the HTTP pool (0 = no limit)",
+    )
+    parser.add_argument(
+        "-dt",
+        "--dns_ttl",
+        default=300,
+        type=int,
+        help="Seconds to cache DNS lookups (0 = disable the cache)",
+    )
+    parser.add_argument(
+        "-ka",
+        "--keepalive",
+        default=30.0,
+        type=float,
+        help="Seconds an idle connection is kept open for reuse",
+    )
+    parser.add_argument(
+        "-ct",
+        "--connect_timeout",
+        default=15.0,
+        type=float,
+        help="Seconds to wait for a connection to be established",
+    )
+    parser.add_argument(
+        "-ro",
+        "--read_timeout",
+        default=60.0,
+        type=float,
+        help="Seconds to wait for the next piece of data on an open connection",
+    )
+    parser.add_argument(
+        "-px",
+        "--proxy_file",
+        default=None,
+        type=str,
+        help="Text file with one HTTP proxy URL per line, used in rotation",
+    )
+    parser.add_argument(
+        "-vp",
+        "--variant_policy",
+        default="default",
+        choices=VARIANT_POLICIES,
+        help="Which rendition to download: the page's play address (default), the smallest file, the best quality, or the best H.265 one",
+    )
+    parser.add_argument(
+        "-vh",
+        "--max_height",
+        default=None,
+        type=positive_int,
+        help="Skip renditions taller than this many pixels, e.g. 720",
+    )
+    parser.add_argument(
+        "-vb",
+        "--max_bitrate",
+        default=None,
+        type=positive_int,
+        help="Skip renditions above this bitrate in bits per second, e.g. 800000",
+    )
+    parser.add_argument(
+        "-wb",
+        "--write_buffer",
+        default=1 << 20,
+        type=byte_size,
+        help="Gather this much of a video in memory before each disk write, e.g. 256K or 4M",
+    )
+    parser.add_argument(
+        "-wq",
+        "--write_queue",
+        default=64,
+        type=positive_int,
+        help="Disk writes allowed to queue up before downloads wait for the disk",
+    )
+    parser.add_argument(
+        "-pa",
+        "--preallocate",
+        action="store_true",
+        help="Reserve each video's full size on disk before writing it",
+    )
+    parser.add_argument(
+        "-fs",
+        "--fsync",
+        default="never",
+        choices=FSYNC_POLICIES,
+        help="Flush videos to the disk: never (leave it to the OS), on close, or after every write",
+    )
+    parser.add_argument(
+        "-sg",
+        "--segments",
+        default=1,
+        type=positive_int,
+        help="Download large videos as this many ranges in parallel (1 turns it off)",
+    )
+    parser.add_argument(
+        "-sm",
+        "--segment_min",
+        default=16 << 20,
+        type=byte_size,
+        help="Only split videos at least this big, e.g. 8M (default 16M)",
+    )
+    parser.add_argument(
+        "-ca",
+        "--cache_ttl",
+        default=3600.0,
+        type=float,
+        help="Reuse video details from earlier runs for up to this many seconds, "
+        "or until their play URLs expire (0 turns the cache off)",
+    )
+    parser.add_argument(
+        "-cs",
+        "--cache_size",
+        default=10000,
+        type=positive_int,
+        help="Most video details kept in the cache",
+    )
+    parser.add_argument(
+        "-mr",
+        "--max_rate",
+        default=None,
+        type=parse_rate,
+        help="Cap the combined download speed, e.g. 500K or 5M (bytes per second)",
+    )
+    parser.add_argument(
+        "-hr",
+        "--max_host_rate",
+        default=None,
+        type=parse_rate,
+        help="Cap the download speed from each host, e.g. 500K or 5M",
+    )
+    parser.add_argument(
+        "-mf",
+        "--metrics_file",
+        default=None,
+        type=str,
+        help="Write per-stage latency, throughput and retry counts to this JSON file",
+    )
+    parser.add_argument(
+        "-mp",
+        "--metrics_port",
+        default=None,
+        type=int,
+        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics during the run",
+    )
     return parser.parse_args()
 
 
+def downloader_options(args):
+    return {
+        "max_details": args.max_details,
+        "max_videos": args.max_videos,
+        "max_per_host": args.max_per_host,
+        "force_download": args.force_download,
+        "parse_workers": args.parse_workers,
+        "parse_mode": args.parse_mode,
+        "retries": args.retries,
+        "backoff": args.backoff,
+        "pool_size": args.pool_size,
+        "dns_ttl": args.dns_ttl,
+        "keepalive": args.keepalive,
+        "connect_timeout": args.connect_timeout,
+        "read_timeout": args.read_timeout,
+        "proxy_file": args.proxy_file,
+        "max_rate": args.max_rate,
+        "max_host_rate": args.max_host_rate,
+        "json_format": args.json_format,
+        "variant_policy": args.variant_policy,
+        "max_height": args.max_height,
+        "max_bitrate": args.max_bitrate,
+        "write_buffer": args.write_buffer,
+        "write_queue": args.write_queue,
+        "preallocate": args.preallocate,
+        "fsync": args.fsync,
+        "segments": args.segments,
+        "segment_min": args.segment_min,
+        "cache_ttl": args.cache_ttl,
+        "cache_size": args.cache_size,
+    }
+
+
+def load_usernames(batch_file: str):
+    with open(batch_file, "r") as file:
+        return [
+            sanitize_channel_url(line.strip()).split("@")[-1]
+            for line in file
+            if line.strip() and not line.startswith("#")
+        ]
+
+
+def scrape_account(pool: "DriverPool", username: str, args):
+    from api.tiktokscraper import TiktokScraper
+
+    try:
+        with pool.acquire() as driver, metrics.stage("scrape"):
+            tiktok_scraper = TiktokScraper(
+                channel_url=username,
+                headless=args.headless,
+                enable_log=args.enable_log,
+                max_windows=args.maximized_windows,
+                adaptive_scroll=args.adaptive_scroll,
+                stall_timeout=args.stall_timeout,
+                driver=driver,
+                quiet=True,
+            )
+            tiktok_scraper.scrape_video_link()
+        return username
+    except (Exception, TiktokException) as error:
+        console.print(f"[red1]Skipping '{username}':[/] {error}")
+        return None
+
+
+async def scrape_batch(usernames: list, args):
+    """Collect the links of every account, returning the ones that succeeded."""
+    if args.http_only:
+        from api.itemlist import ItemListScraper
+
+        limit = asyncio.Semaphore(args.browsers)
+
+        async def scrape(username: str):
+            async with limit:
+                try:
+                    with metrics.stage("scrape"):
+                        await ItemListScraper(
+                            channel_url=username, base_url=args.base_url
+                        ).scrape_video_link()
+                    return username
+                except (Exception, TiktokException) as error:
+                    console.print(f"[red1]Skipping '{username}':[/] {error}")
+                    return None
+
+        scraped = await asyncio.gather(*(scrape(username) for username in usernames))
+    else:
+        from api.tiktokscraper import DriverPool
+
+        pool = DriverPool(args.browsers, args.headless, args.maximized_windows)
+        try:
+            scraped = await asyncio.gather(
+                *(
+                    asyncio.to_thread(scrape_account, pool, username, args)
+                    for username in usernames
+                )
+            )
+        finally:
+            pool.close()
+    return [username for username in scraped if username]
+
+
 def timer_wrapper(coroutine):
     async def wrapper(*args, **kwargs):
         start_time = time.time()
@@ -84,38 +497,93 @@ def timer_wrapper(coroutine):
     return wrapper
 
 
-@timer_wrapper
-async def main():
-    os.system("cls" if os.name == "nt" else "clear")
-    args = parse_arguments()
-    if args.download_only:
+async def run(args):
+    if args.verify:
+        from api.verify import verify_downloads
+
+        ProgramLogo.setup_logo()
+        await asyncio.to_thread(verify_downloads, args.verify_workers)
+    elif args.batch_file:
+        ProgramLogo.setup_logo()
+        usernames = load_usernames(args.batch_file)
+        if not args.download_only:
+            usernames = await scrape_batch(usernames, args)
+        await AsyncBatchDownloader(
+            usernames=usernames,
+            save_json=args.save_json,
+            transient=args.transient,
+            instant_clear=args.instant_clear,
+            progress_mode=args.progress_mode,
+            top_transfers=args.top_transfers,
+            **downloader_options(args),
+        )
+    elif args.download_only:
         ProgramLogo.setup_logo()
         await AsyncDownloader(
             username=args.username,
             save_json=args.save_json,
             transient=args.transient,
             instant_clear=args.instant_clear,
+            progress_mode=args.progress_mode,
+            top_transfers=args.top_transfers,
+            **downloader_options(args),
         )
     else:
         if not args.username:
             os.system("python main.py -h" if os.name == "nt" else "python3 main.py -h")
             return
 
-        tiktok_scraper = TiktokScraper(
-            channel_url=args.username,
-            headless=args.headless,
-            enable_log=args.enable_log,
-            max_windows=args.maximized_windows,
-        )
-        username = tiktok_scraper.get_username
-        tiktok_scraper.scrape_video_link()
+        if args.http_only:
+            from api.itemlist import ItemListScraper
+
+            ProgramLogo.setup_logo()
+            item_list_scraper = ItemListScraper(
+                channel_url=args.username, base_url=args.base_url
+            )
+            username = item_list_scraper.get_username
+            with metrics.stage("scrape"):
+                await item_list_scraper.scrape_video_link()
+        else:
+            from api.tiktokscraper import TiktokScraper
+
+            tiktok_scraper = TiktokScraper(
+                channel_url=args.username,
+                headless=args.headless,
+                enable_log=args.enable_log,
+                max_windows=args.maximized_windows,
+                adaptive_scroll=args.adaptive_scroll,
+                stall_timeout=args.stall_timeout,
+            )
+            username = tiktok_scraper.get_username
+            with metrics.stage("scrape"):
+                tiktok_scraper.scrape_video_link()
         await AsyncDownloader(
             username=username,
             save_json=args.save_json,
             transient=args.transient,
             instant_clear=args.instant_clear,
+            progress_mode=args.progress_mode,
+            top_transfers=args.top_transfers,
+            **downloader_options(args),
         )
 
 
+@timer_wrapper
+async def main():
+    os.system("cls" if os.name == "nt" else "clear")
+    args = parse_arguments()
+    metrics_server = (
+        await serve_metrics(args.metrics_port) if args.metrics_port else None
+    )
+    try:
+        await run(args)
+    finally:
+        if metrics_server:
+            await metrics_server.cleanup()
+        if args.metrics_file:
+            metrics.write_summary(args.metrics_file)
+            console.print(f'Run metrics saved in "[blue1]{args.metrics_file}[/]"')
+
+
 if __name__ == "__main__":
     asyncio.run(main())
@@ -2,3 +2,19 @@ from rich.console import Console
 
 """Create a console instance once"""
 console = Console()
+
+
+class QuietStatus:
+    """Stand-in for console.status when several scrapers run side by side."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        pass
+
+    def update(self, *_, **__):
+        pass
+
+    def stop(self):
+        pass
@@ -1,4 +1,10 @@
+import asyncio
+import time
+from collections import deque
+
 from rich.console import Group
+from rich.filesize import decimal
+from rich.live import Live
 from rich.panel import Panel
 from rich.progress import (
     BarColumn,
@@ -9,6 +15,14 @@ from rich.progress import (
     TimeRemainingColumn,
     TransferSpeedColumn,
 )
+from rich.progress_bar import ProgressBar as Bar
+from rich.table import Table
+
+from .console import console
+
+PROGRESS_MODES = ("auto", "full", "compact", "plain", "quiet")
+FULL_MODE_LIMIT = 100
+THROUGHPUT_WINDOW = 3.0
 
 
 class ProgressBar:
@@ -33,3 +47,208 @@ class ProgressBar:
     @staticmethod
     def create_progess_panel(job_progress: Progress, overall_progress: Progress):
         return Panel(Group(job_progress, overall_progress))
+
+    @staticmethod
+    def resolve_mode(mode: str, total: int):
+        """Pick a concrete mode for "auto": plain off a TTY, compact for big runs."""
+        if mode != "auto":
+            return mode
+        if not console.is_terminal:
+            return "plain"
+        return "full" if total <= FULL_MODE_LIMIT else "compact"
+
+
+class Transfer:
+    """Byte counters of one video. The download loop only ever writes `completed`."""
+
+    __slots__ = ("description", "total", "completed", "task", "_offset", "_started")
+
+    def __init__(self, description: str, total: int, completed: int):
+        self.description = description
+        self.total = total
+        self.completed = completed
+        self.task = None
+        self._offset = completed
+        self._started = time.monotonic()
+
+    @property
+    def transferred(self):
+        return self.completed - self._offset
+
+    @property
+    def speed(self):
+        elapsed = time.monotonic() - self._started
+        return self.transferred / elapsed if elapsed > 0 else 0.0
+
+
+class TransferProgress:
+    """Progress display for the download pipeline.
+
+    Transfers only bump plain counters, and a single refresh task folds them
+    into the display a few times a second, so the per-chunk cost stays flat
+    however many videos are queued.
+
+    Modes:
+        full     one bar per video, as before
+        compact  the `top` fastest active transfers plus aggregate throughput
+        plain    timestamped log lines, for cron jobs and other non-TTY runs
+        quiet    no output at all, for library use
+    """
+
+    def __init__(
+        self,
+        total: int,
+        mode: str = "auto",
+        top: int = 10,
+        label: str = "",
+        transient: bool = False,
+        instant_clear: bool = False,
+        refresh_per_second: int = 10,
+        log_interval: float = 10.0,
+    ):
+        self.total = total
+        self.mode = ProgressBar.resolve_mode(mode, total)
+        self.top = top
+        self.label = label
+        self.transient = transient
+        self.instant_clear = instant_clear
+        self.interval = 1 / refresh_per_second
+        self.log_interval = log_interval
+        self.active = {}
+        self.done = 0
+        self.failed = 0
+        self.throughput = 0.0
+        self.retired_bytes = 0
+        self._logged = time.monotonic()
+        self._samples = deque([(self._logged, 0)])
+        self._live = None
+        self._refresher = None
+        self.job_progress, self.overall_progress = ProgressBar.setup_progress_bars()
+        self.overall_task = self.overall_progress.add_task(
+            f"[yellow1]Overall progress...{label}", total=total
+        )
+
+    async def __aenter__(self):
+        if self.mode in ("full", "compact"):
+            self._live = Live(
+                self._renderable(), auto_refresh=False, transient=self.transient
+            )
+            self._live.start(refresh=True)
+        self._refresher = asyncio.create_task(self._refresh_loop())
+        return self
+
+    async def __aexit__(self, *_):
+        self._refresher.cancel()
+        self.refresh()
+        if self._live:
+            self._live.stop()
+        elif self.mode == "plain":
+            self._log_status()
+
+    def start(self, description: str, total: int, completed: int = 0):
+        transfer = Transfer(description, total, completed)
+        if self.mode == "full":
+            transfer.task = self.job_progress.add_task(
+                f"[blue_violet]Downloading [blue1]{description}",
+                total=total,
+                completed=completed,
+            )
+        self.active[id(transfer)] = transfer
+        return transfer
+
+    def finish(self, transfer: Transfer):
+        self._retire(transfer)
+        self.done += 1
+        if transfer.task is not None:
+            self.job_progress.update(transfer.task, completed=transfer.completed)
+            for task in self.job_progress.tasks:
+                if task.id == transfer.task and task.finished_speed is None:
+                    # Too quick for two refresh samples, so rich has no speed of its own
+                    task.finished_speed = transfer.speed
+            if self.instant_clear:
+                self.job_progress.remove_task(transfer.task)
+        elif self.mode == "plain":
+            console.print(
+                f"{time.strftime('%H:%M:%S')} Downloaded [blue1]{transfer.description}[/] "
+                f"({decimal(transfer.completed)})",
+                highlight=False,
+            )
+
+    def discard(self, transfer: Transfer):
+        """Drop a transfer that failed; the retry starts a fresh one."""
+        self._retire(transfer)
+        if transfer.task is not None:
+            self.job_progress.remove_task(transfer.task)
+
+    def advance(self, failed: bool = False):
+        """Count a video that finished without a byte transfer of its own."""
+        if failed:
+            self.failed += 1
+        else:
+            self.done += 1
+
+    def _retire(self, transfer: Transfer):
+        self.retired_bytes += transfer.transferred
+        self.active.pop(id(transfer), None)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.refresh()
+
+    def refresh(self):
+        now = time.monotonic()
+        moved = self.retired_bytes
+        for transfer in list(self.active.values()):
+            moved += transfer.transferred
+            if transfer.task is not None:
+                self.job_progress.update(transfer.task, completed=transfer.completed)
+        self._samples.append((now, moved))
+        while now - self._samples[0][0] > THROUGHPUT_WINDOW:
+            self._samples.popleft()
+        first_time, first_moved = self._samples[0]
+        if now > first_time:
+            self.throughput = (moved - first_moved) / (now - first_time)
+
+        self.overall_progress.update(
+            self.overall_task,
+            completed=self.done + self.failed,
+            description=f"[yellow1]Overall progress...{self.label} "
+            f"[grey62]{decimal(int(self.throughput))}/s[/]",
+        )
+        if self._live:
+            self._live.update(self._renderable(), refresh=True)
+        elif self.mode == "plain" and now - self._logged >= self.log_interval:
+            self._log_status()
+
+    def _log_status(self):
+        self._logged = time.monotonic()
+        console.print(
+            f"{time.strftime('%H:%M:%S')} {self.done}/{self.total} done, "
+            f"{self.failed} failed, {len(self.active)} active, "
+            f"{decimal(int(self.throughput))}/s",
+            highlight=False,
+        )
+
+    def _renderable(self):
+        if self.mode == "full":
+            return ProgressBar.create_progess_panel(
+                self.job_progress, self.overall_progress
+            )
+
+        transfers = sorted(self.active.values(), key=lambda t: t.speed, reverse=True)
+        table = Table.grid(padding=(0, 1))
+        for transfer in transfers[: self.top]:
+            table.add_row(
+                f"[blue_violet]Downloading [blue1]{transfer.description}",
+                Bar(total=transfer.total or None, completed=transfer.completed),
+                f"{decimal(transfer.completed)}/{decimal(transfer.total)}",
+                "•",
+                f"[red]{decimal(int(transfer.speed))}/s",
+            )
+        hidden = len(transfers) - self.top
+        rows = [table]
+        if hidden > 0:
+            rows.append(f"[grey62]... and {hidden} more active transfers[/]")
+        rows.append(self.overall_progress)
+        return Panel(Group(*rows))